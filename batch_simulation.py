@@ -0,0 +1,92 @@
+import argparse
+import multiprocessing
+import os
+import statistics
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from loader_functions.initialize_new_game import get_constants
+from simulation import BotInput, new_session, run_headless
+
+
+def simulate_game(game_index, max_turns, constants, seed=None):
+    """
+    Plays one game with the bot and returns its statistics. Runs in a worker process.
+    """
+    session = new_session(constants, seed)
+    
+    start = time.perf_counter()
+    outcome = run_headless(session, BotInput(), max_turns)
+    elapsed = time.perf_counter() - start
+    
+    return {
+        'game': game_index,
+        'seed': session.game_map.seed,
+        'outcome': outcome,
+        'depth': session.game_map.dungeon_level,
+        'turns': session.turn,
+        'kills': session.kills,
+        'cause_of_death': session.cause_of_death,
+        'time_per_turn': elapsed / max(session.turn, 1),
+    }
+
+
+def run_batch(games, max_turns, workers=None, constants=None, seed=None):
+    """
+    Plays independent games in a process pool and returns the list of their statistics.
+    With a seed, game i is played with seed + i so the whole batch can be replayed.
+    """
+    if constants is None:
+        constants = get_constants()
+    
+    # Forking a process that already played a game copies the floor generator thread's locks, start fresh workers instead
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        futures = [executor.submit(simulate_game, game_index, max_turns, constants, None if seed is None else seed + game_index)
+                   for game_index in range(games)]
+        
+        return [future.result() for future in futures]
+
+
+def aggregate(results):
+    deaths = [result for result in results if result['outcome'] == 'dead']
+    
+    return {
+        'games': len(results),
+        'deaths': len(deaths),
+        'mean_depth': statistics.mean(result['depth'] for result in results),
+        'max_depth': max(result['depth'] for result in results),
+        'mean_turns': statistics.mean(result['turns'] for result in results),
+        'mean_kills': statistics.mean(result['kills'] for result in results),
+        'causes_of_death': Counter(result['cause_of_death'] for result in deaths),
+        'mean_time_per_turn': statistics.mean(result['time_per_turn'] for result in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Play many headless games in parallel and aggregate their statistics.')
+    parser.add_argument('--games', type=int, default=100, help='number of games to play')
+    parser.add_argument('--turns', type=int, default=1000, help='maximum number of turns per game')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='number of worker processes')
+    parser.add_argument('--seed', type=int, default=None, help='seed of the first game, the next games use the following seeds')
+    args = parser.parse_args()
+    
+    start = time.perf_counter()
+    results = run_batch(args.games, args.turns, args.workers, seed=args.seed)
+    elapsed = time.perf_counter() - start
+    
+    summary = aggregate(results)
+    
+    print('{0} games in {1:.1f}s with {2} workers'.format(summary['games'], elapsed, args.workers))
+    print('Deaths: {0}'.format(summary['deaths']))
+    print('Depth: mean {0:.1f}, max {1}'.format(summary['mean_depth'], summary['max_depth']))
+    print('Turns survived: mean {0:.0f}'.format(summary['mean_turns']))
+    print('Kills: mean {0:.1f}'.format(summary['mean_kills']))
+    print('Time per turn: mean {0:.3f}ms'.format(summary['mean_time_per_turn'] * 1000))
+    
+    for cause, count in summary['causes_of_death'].most_common():
+        print('  Killed by {0}: {1}'.format(cause, count))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Memory used by the entities of the game, in bytes per entity.
+Run it from the root of the repository: python -m benchmarks.entity_memory
+"""
+import argparse
+import tracemalloc
+
+from entity import Entity
+from components.inventory import Inventory
+from components.level import Level
+from components.equipement import Equipement
+from map_objects.game_map import GameMap
+from spawn_functions import load_prototypes
+
+
+def measure(build, count):
+    # Bytes allocated by build() for count objects, the objects are kept alive while measuring
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [build(index) for index in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    
+    return (after - before) / len(objects)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the memory used per entity.')
+    parser.add_argument('--count', type=int, default=100000, help='number of entities of each kind to create')
+    args = parser.parse_args()
+    
+    game_map = GameMap(10, 10)
+    prototypes = load_prototypes()
+    
+    print('{0:<20} {1:>10}'.format('kind', 'bytes'))
+    
+    for key, prototype in prototypes.items():
+        print('{0:<20} {1:>10.0f}'.format(key, measure(lambda index: prototype.spawn(index % 10, index // 10 % 10, game_map), args.count)))
+    
+    player_size = measure(lambda index: Entity(0, 0, 'Player', '@', None, inventory=Inventory(26), level=Level(),
+                                               equipement=Equipement()), args.count)
+    print('{0:<20} {1:>10.0f}'.format('player', player_size))
+    
+    # A tile view, as created by game_map.tiles[x][y]
+    tiles = game_map.tiles[0]
+    print('{0:<20} {1:>10.0f}'.format('tile', measure(lambda index: tiles[index % 10], args.count)))
+
+
+if __name__ == "__main__":
+    main()
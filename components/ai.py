@@ -1,43 +1,79 @@
-import tcod as libtcod
-from random import randint
-
 from game_messages import Message
+from map_objects.fov_functions import is_in_fov
 
 class BasicMonster:
+    __slots__ = ('owner',)
+    
+    # It only acts when it sees its target, so it can sleep when far from the player
+    dormant_when_far = True
+    
+    def __init__(self):
+        self.owner = None
     
     def take_turn(self, target, entities, fov_map, game_map):
         results = []
         
         monster = self.owner
-        if libtcod.map_is_in_fov(fov_map, monster.x, monster.y):
+        if is_in_fov(fov_map, monster.x, monster.y):
             if monster.distance_to(target) >= 2:
-                monster.move_astar(target, entities, game_map)
+                self.chase(target, entities, game_map)
             elif target.fighter.hp > 0:
                 attack_results = monster.fighter.attack(target)
                 results.extend(attack_results)
                 
         return results
+    
+    def chase(self, target, entities, game_map):
+        self.owner.move_astar(target, entities, game_map)
 
-class ConfusedMonster:
+class FlowFieldMonster(BasicMonster):
+    """
+    A BasicMonster that chases its target by walking down the Dijkstra map shared by all monsters,
+    instead of running its own A* search.
+    """
+    __slots__ = ()
     
-    def __init__(self, previous_ai, number_of_turns):
-        self.preivous_ai = previous_ai
-        self.number_of_turns = number_of_turns
+    DIRECTIONS = ((-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1))
+    
+    def chase(self, target, entities, game_map):
+        monster = self.owner
+        flow_field = game_map.get_flow_field(target)
         
-    def take_turn(self, target, entities, fov_map, game_map):
-        results = []
+        # Find the free neighbour tile that is the closest to the target
+        best_move = None
+        best_distance = flow_field[monster.x, monster.y]
         
-        if self.number_of_turns > 0:
-            random_x = self.owner.x + randint(0, 2) - 1
-            random_y = self.owner.y + randint(0, 2) - 1
+        for dx, dy in self.DIRECTIONS:
+            x = monster.x + dx
+            y = monster.y + dy
             
-            if random_x != self.owner.x and random_y != self.owner.y:
-                self.owner.move_towards(random_x, random_y, game_map)
-            
-            self.number_of_turns -= 1
+            if 0 <= x < game_map.width and 0 <= y < game_map.height and game_map.cost[x, y] and flow_field[x, y] < best_distance:
+                best_move = (dx, dy)
+                best_distance = flow_field[x, y]
         
+        # Same rule as move_astar: only follow paths shorter than 25 tiles (the neighbour tile plus its distance)
+        if best_move and best_distance + 1 < 25:
+            monster.move(*best_move, game_map)
         else:
-            self.owner.ai = self.preivous_ai
-            results.append({'message': Message('The {0} is no longer confused!'.format(self.owner.name), libtcod.red)})
+            monster.move_towards(target.x, target.y, game_map)
+
+class ConfusedMonster:
+    """
+    Stumbles around at random. The Confusion status effect puts it in place of the monster AI, and gives the AI back when it expires.
+    """
+    __slots__ = ('owner', 'preivous_ai')
+    
+    dormant_when_far = False
+    
+    def __init__(self, previous_ai):
+        self.owner = None
+        self.preivous_ai = previous_ai
+        
+    def take_turn(self, target, entities, fov_map, game_map):
+        random_x = self.owner.x + game_map.rng.randint(0, 2) - 1
+        random_y = self.owner.y + game_map.rng.randint(0, 2) - 1
+        
+        if random_x != self.owner.x and random_y != self.owner.y:
+            self.owner.move_towards(random_x, random_y, game_map)
         
-        return results
\ No newline at end of file
+        return []
\ No newline at end of file
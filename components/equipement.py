@@ -3,72 +3,55 @@ from __future__ import annotations
 from equipement_slots import EquipementSlots
 
 class Equipement:
+    """
+    The items an entity has equipped, one per slot (any EquipementSlots member). The bonuses of the equipped items
+    are summed when the equipment changes, so the stats of the fighter are read in constant time.
+    """
+    __slots__ = ('owner', 'equipped', 'max_hp_bonus', 'defense_bonus', 'power_bonus')
     
-    def __init__(self, main_hand: Entity = None, off_hand: Entity = None):
-        self.main_hand = main_hand
-        self.off_hand = off_hand
-        
-    @property
-    def max_hp_bonus(self):
-        bonus = 0
-        
-        if self.main_hand and self.main_hand.equippable:
-            bonus += self.main_hand.equippable.max_hp_bonus
-        
-        if self.off_hand and self.off_hand.equippable:
-            bonus += self.off_hand.equippable.max_hp_bonus
-            
-        return bonus
+    def __init__(self):
+        self.owner = None
+        self.equipped = {}
+        self.update_bonuses()
     
     @property
-    def defense_bonus(self):
-        bonus = 0
-        
-        if self.main_hand and self.main_hand.equippable:
-            bonus += self.main_hand.equippable.defense_bonus
-        
-        if self.off_hand and self.off_hand.equippable:
-            bonus += self.off_hand.equippable.defense_bonus
-            
-        return bonus
+    def main_hand(self):
+        return self.equipped.get(EquipementSlots.MAIN_HAND)
     
     @property
-    def power_bonus(self):
-        bonus = 0
+    def off_hand(self):
+        return self.equipped.get(EquipementSlots.OFF_HAND)
+    
+    def slot_of(self, item: Entity):
+        # The slot where the item is equipped, or None
+        if item.equippable and self.equipped.get(item.equippable.slot) == item:
+            return item.equippable.slot
         
-        if self.main_hand and self.main_hand.equippable:
-            bonus += self.main_hand.equippable.power_bonus
+        return None
+    
+    def update_bonuses(self):
+        equippables = [item.equippable for item in self.equipped.values() if item.equippable]
         
-        if self.off_hand and self.off_hand.equippable:
-            bonus += self.off_hand.equippable.power_bonus
-            
-        return bonus
+        self.max_hp_bonus = sum(equippable.max_hp_bonus for equippable in equippables)
+        self.defense_bonus = sum(equippable.defense_bonus for equippable in equippables)
+        self.power_bonus = sum(equippable.power_bonus for equippable in equippables)
     
     def toggle_equip(self, equippable_entity):
         results = []
         
         slot = equippable_entity.equippable.slot
+        current_item = self.equipped.get(slot)
+        
+        if current_item == equippable_entity:
+            del self.equipped[slot]
+            results.append({'dequipped': equippable_entity})
+        else:
+            if current_item:
+                results.append({'dequipped': current_item})
+            
+            self.equipped[slot] = equippable_entity
+            results.append({'equipped': equippable_entity})
         
-        if slot == EquipementSlots.MAIN_HAND:
-            if self.main_hand == equippable_entity:
-                self.main_hand = None
-                results.append({'dequipped': equippable_entity})
-            else:
-                if self.main_hand:
-                   results.append({'dequipped': self.main_hand})
-                   
-                self.main_hand = equippable_entity
-                results.append({'equipped': equippable_entity})
-                
-        elif slot == EquipementSlots.OFF_HAND:
-            if self.off_hand == equippable_entity:
-                self.off_hand = None
-                results.append({'dequipped': equippable_entity})
-            else:
-                if self.off_hand:
-                   results.append({'dequipped': self.off_hand})
-                   
-                self.off_hand = equippable_entity
-                results.append({'equipped': equippable_entity})
+        self.update_bonuses()
         
-        return results
\ No newline at end of file
+        return results
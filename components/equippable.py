@@ -1,6 +1,8 @@
 class Equippable:
+    __slots__ = ('owner', 'slot', 'power_bonus', 'defense_bonus', 'max_hp_bonus')
     
     def __init__(self, slot, power_bonus=0, defense_bonus=0, max_hp_bonus=0):
+        self.owner = None
         self.slot = slot
         self.power_bonus = power_bonus
         self.defense_bonus = defense_bonus
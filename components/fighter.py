@@ -1,9 +1,37 @@
 from __future__ import annotations
 from game_messages import Message
 
+def stat(name):
+    # A stat held by the fighter itself, or by its row of the FighterStore once it is in one
+    slot = '_' + name
+    
+    def get_stat(self):
+        if self.store is None:
+            return getattr(self, slot)
+        
+        return int(getattr(self.store, name)[self.index])
+    
+    def set_stat(self, value):
+        if self.store is None:
+            setattr(self, slot, value)
+        else:
+            getattr(self.store, name)[self.index] = value
+    
+    return property(get_stat, set_stat)
+
 class Fighter:
+    __slots__ = ('owner', 'store', 'index', '_base_max_hp', '_hp', '_base_defense', '_base_power', '_xp')
+    
+    hp = stat('hp')
+    base_max_hp = stat('base_max_hp')
+    base_defense = stat('base_defense')
+    base_power = stat('base_power')
+    xp = stat('xp')
     
     def __init__(self, hp, defense, power, xp=0):
+        self.owner = None
+        self.store = None
+        self.index = None
         self.base_max_hp = hp
         self.hp = hp
         self.base_defense = defense
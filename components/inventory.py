@@ -4,7 +4,10 @@ import tcod as libtcod
 from game_messages import Message
 
 class Inventory:
+    __slots__ = ('owner', 'capacity', 'items')
+    
     def __init__(self, capacity):
+        self.owner = None
         self.capacity = 26
         self.items = []
     
@@ -59,7 +62,7 @@ class Inventory:
     def drop_item(self, item: Entity):
         results = []
         
-        if self.owner.equipement.main_hand == item or self.owner.eqipement.off_hand == item:
+        if self.owner.equipement and self.owner.equipement.slot_of(item):
             self.owner.equipement.toggle_equip(item)
             
         item.x = self.owner.x
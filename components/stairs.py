@@ -1,4 +1,6 @@
 class Stairs:
+    __slots__ = ('owner', 'floor')
     
     def __init__(self, floor):
+        self.owner = None
         self.floor = floor
\ No newline at end of file
@@ -5,15 +5,24 @@ from game_states import GameStates
 from render_functions import RenderOrder
 from game_messages import Message
 
-def kill_player(player: Entity):
+def kill_player(player: Entity, game_map: GameMap):
+    # Take the player off the map while it changes, so its tile gets redrawn
+    game_map.remove_entity(player.x, player.y, player)
+    
     player.char = '%'
     player.color = libtcod.red
     
+    game_map.set_entity(player.x, player.y, player)
+    
     return Message('You died !!', libtcod.red), GameStates.PLAYER_DEAD
 
 def kill_monster(monster: Entity, game_map: GameMap):
     death_message = Message('{0} is dead!'.format(monster.name.capitalize()), libtcod.orange)
     
+    # The corpse no longer blocks the tile, so take it off the map while its components change
+    game_map.remove_entity(monster.x, monster.y, monster)
+    game_map.actors.remove(monster)
+    
     monster.char = '%'
     monster.color = libtcod.red
     monster.fighter = None
@@ -21,4 +30,6 @@ def kill_monster(monster: Entity, game_map: GameMap):
     monster.name = 'remains of {0}'.format(monster.name)
     monster.render_order = RenderOrder.CORPSE
     
+    game_map.set_entity(monster.x, monster.y, monster)
+    
     return death_message
\ No newline at end of file
@@ -9,10 +9,14 @@ class Entity:
     """
     A generic object to represent players, enemies, items, etc.
     """
+    # Thousands of entities live at the same time, slots keep them small
+    __slots__ = ('x', 'y', 'name', 'char', 'color', 'fighter', 'ai', 'item', 'inventory', 'stairs',
+                 'level', 'equipement', 'equippable', 'render_order', 'speed')
+    
     def __init__(self, x, y, name, char, color, fighter: Fighter = None, ai: BasicMonster = None, 
                  item: Item = None, inventory: Inventory = None, stairs: Stairs = None,
                  level: Level = None, equipement: Equipement = None, equippable: Equippable = None, 
-                 render_order: RenderOrder = RenderOrder.CORPSE):
+                 render_order: RenderOrder = RenderOrder.CORPSE, speed=100):
         self.x = x
         self.y = y
         self.name = name
@@ -28,6 +32,9 @@ class Entity:
         self.equippable = equippable
         self.render_order = render_order
         
+        # How often it acts: 100 is once per turn
+        self.speed = speed
+        
         if self.fighter:
             self.fighter.owner = self
         
@@ -77,51 +84,39 @@ class Entity:
         dx = int(round(dx / distance))
         dy = int(round(dy / distance))
         
-        if not (game_map.is_blocked(self.x + dx, self.y + dy) or len(game_map.get_entities(self.x + dx, self.y + dy)) == 0):
+        # Only move if the tile is walkable and no fighter stands on it
+        if game_map.cost[self.x + dx, self.y + dy]:
             self.move(dx, dy, game_map)
             
     def move_astar(self, target: Entity, entities: list, game_map: GameMap):
-        # Create a FOV map that has the dimensions of the map
-        fov_map = libtcod.map_new(game_map.width, game_map.height)
-        
-        # Scan the current map each turn and set all the walls as unwalkable
-        for y1 in range(game_map.height):
-            for x1 in range(game_map.width):
-                fov_map.transparent[y1][x1] = not game_map.tiles[x1][y1].block_sight
-                fov_map.walkable[y1][x1] = not game_map.tiles[x1][y1].blocked
-                
-                # Scan all the tiles to see if there are objects that must be navigated around
-                # Check also that the object isn't self or the target (so that the start and the end points are free)
-                # The AI class handles the situation if self is next to the target so it will not use this A* function anyway
-                entities_in_tile = game_map.get_entities(x1, y1)
-                if len(entities_in_tile) != 0:
-                    for entity in entities_in_tile:
-                        if entity != target and entity != self:
-                            fov_map.walkable[y1][x1] = False
-        
-        # Allocate a A* path
-        # The 1.41 is the normal diagonal cost of moving, it can be set as 0.0 if diagonal moves are prohibited
-        my_path = libtcod.path_new_using_map(fov_map, 1.41)
+        # The map keeps an up to date cost grid where walls and fighters are blocked (cost 0)
+        cost = game_map.cost
+        
+        # Free the start and the end points, so that self and the target do not block their own path
+        # The AI class handles the situation if self is next to the target so it will not use this A* function anyway
+        self_cost = cost[self.x, self.y]
+        target_cost = cost[target.x, target.y]
+        cost[self.x, self.y] = 1
+        cost[target.x, target.y] = 1
         
         # Compute the path between self's coordinates and the target's coordinates
-        libtcod.path_compute(my_path, self.x, self.y, target.x, target.y)
+        # The 1.41 is the normal diagonal cost of moving, it can be set as 0.0 if diagonal moves are prohibited
+        path = libtcod.path.AStar(cost, diagonal=1.41).get_path(self.x, self.y, target.x, target.y)
+        
+        cost[self.x, self.y] = self_cost
+        cost[target.x, target.y] = target_cost
         
         # Check if the path exists, and in this case, also the path is shorter than 25 tiles
         # The path size matters if you want the monster to use alternative longer paths (for example through other rooms) if for example the player is in a corridor
         # It makes sense to keep path size relatively low to keep the monsters from running around the map if there's an alternative path really far away
-        if not libtcod.path_is_empty(my_path) and libtcod.path_size(my_path) < 25:
-            # Find the next coordinates in the computed full path
-            x, y = libtcod.path_walk(my_path, True)
-            if x or y:
-                # Set self's coordinates to the next path tile
-                self.move(x - self.x, y - self.y, game_map)
+        if path and len(path) < 25:
+            # Set self's coordinates to the next path tile
+            x, y = path[0]
+            self.move(x - self.x, y - self.y, game_map)
         else:
             # Keep the old move function as a backup so that if there are no paths (for example another monster blocks a corridor)
             # it will still try to move towards the player (closer to the corridor opening)
             self.move_towards(target.x, target.y, game_map)
-
-        # Delete the path to free memory
-        libtcod.path_delete(my_path)        
         
     def distance_to(self, other: Entity):
         dx = other.x - self.x
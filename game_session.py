@@ -0,0 +1,318 @@
+import tcod as libtcod
+
+from map_objects.fov_functions import initialize_fov, recompute_fov
+from game_states import GameStates
+from death_functions import kill_monster, kill_player
+from game_messages import Message
+
+
+class GameSession:
+    """
+    The turn logic of a running game. It doesn't know anything about the window, so it is shared
+    by the engine and the headless simulation.
+    """
+    def __init__(self, player, entities, game_map, message_log, game_state, constants):
+        self.player = player
+        self.entities = entities
+        self.game_map = game_map
+        self.message_log = message_log
+        self.game_state = game_state
+        self.constants = constants
+        
+        # FOV init
+        self.fov_recompute = True
+        self.fov_map = initialize_fov(game_map)
+        
+        # The next floor is generated while the player explores this one
+        game_map.pregenerate_floor(game_map.dungeon_level + 1, constants)
+        
+        # Game State
+        self.previous_game_state = game_state
+        
+        # Targeting system
+        self.targeting_item = None
+        
+        # Statistics of the game
+        self.turn = 0
+        self.kills = 0
+        self.cause_of_death = None
+    
+    def recompute_fov(self):
+        if self.fov_recompute:
+            recompute_fov(self.fov_map, self.player.x, self.player.y, self.constants['fov_algorithm'],
+                          self.constants['fov_radius'], self.constants['fov_light_walls'])
+            
+            self.game_map.explored |= self.fov_map.fov
+    
+    def play(self, action, mouse_action):
+        """
+        Plays an action of the player, then the enemy turn if the action took a turn.
+        Returns a dict telling the caller about the events it has to handle itself: 'new_floor' and 'exit'.
+        """
+        events = {}
+        
+        player = self.player
+        game_map = self.game_map
+        message_log = self.message_log
+        
+        move = action.get("move")
+        wait = action.get("wait")
+        pickup = action.get('pickup')
+        show_inventory = action.get('show_inventory')
+        drop_inventory = action.get('drop_inventory')
+        inventory_index = action.get("inventory_index")
+        take_stairs = action.get("take_stairs")
+        level_up_stat = action.get("level_up_stat")
+        show_character_screen = action.get("show_character_screen")
+        exit_game = action.get("exit")
+        
+        left_click = mouse_action.get('left_click')
+        right_click = mouse_action.get('right_click')
+        
+        # Managing player's turn
+        player_turn_results = []
+        
+        # Handling player waiting
+        if wait:
+            self.game_state = GameStates.ENEMY_TURN
+        
+        # Handling player movement and fighting
+        elif move and self.game_state == GameStates.PLAYERS_TURN:
+            dx, dy = move
+            if not game_map.is_blocked(player.x + dx, player.y + dy):
+                entities_in_tile = game_map.get_entities(player.x + dx, player.y + dy)
+                if not any(entity.fighter for entity in entities_in_tile):
+                    player.move(dx, dy, game_map)
+                    self.fov_recompute = True
+                else:
+                    for entity in entities_in_tile:
+                        if entity.fighter:
+                            target = entity
+                    
+                    # Avoid attacking items xD
+                    if not target.item:
+                        player_attack_results = player.fighter.attack(target)
+                        player_turn_results.extend(player_attack_results)
+                
+                self.game_state = GameStates.ENEMY_TURN
+        
+        # Handling picking up items
+        elif pickup and self.game_state == GameStates.PLAYERS_TURN:
+            entities_in_tile = game_map.get_entities(player.x, player.y)
+            picked = False
+            for entity in entities_in_tile:
+                if entity.item:
+                    item = entity
+                    pickup_results = player.inventory.add_item(item)
+                    player_turn_results.extend(pickup_results)
+                    picked = True
+                    break
+            if not picked:
+                message_log.add_message(Message('There is nothing to pick up here !', libtcod.yellow))
+        
+        
+        # Handling inventory
+        if show_inventory:
+            self.previous_game_state = self.game_state
+            self.game_state = GameStates.SHOW_INVENTORY
+        
+        if inventory_index is not None and self.previous_game_state != GameStates.PLAYER_DEAD and inventory_index < len(player.inventory.items):
+            item = player.inventory.items[inventory_index]
+            if self.game_state == GameStates.SHOW_INVENTORY:
+                player_turn_results.extend(player.inventory.use(item, entities=self.entities, game_map=game_map, fov_map=self.fov_map))
+            elif self.game_state == GameStates.DROP_INVENTORY:
+                player_turn_results.extend(player.inventory.drop_item(item))
+        
+        if drop_inventory:
+            self.previous_game_state = self.game_state
+            self.game_state = GameStates.DROP_INVENTORY
+        
+        # Handling targeting
+        if self.game_state == GameStates.TARGETING:
+            if left_click:
+                target_x, target_y = left_click
+                item_use_results = player.inventory.use(self.targeting_item, entities=self.entities, game_map=game_map, fov_map=self.fov_map,
+                                                        target_x=target_x, target_y=target_y)
+                player_turn_results.extend(item_use_results)
+            elif right_click:
+                player_turn_results.append({'targeting_cancelled': True})
+        
+        # Handling stairs
+        if take_stairs and self.game_state == GameStates.PLAYERS_TURN:
+            for entity in game_map.get_entities(player.x, player.y):
+                if entity.stairs:
+                    self.entities = game_map.change_floor(entity.stairs.floor, player, self.entities, self.constants, message_log)
+                    self.fov_map = initialize_fov(game_map)
+                    self.fov_recompute = True
+                    game_map.pregenerate_floor(game_map.dungeon_level + 1, self.constants)
+                    events['new_floor'] = True
+                    break
+            else:
+                message_log.add_message(Message('There are no stairs here.', libtcod.yellow))
+        
+        # Handling stats increase when leveling up
+        if level_up_stat:
+            if level_up_stat == "hp":
+                player.fighter.base_max_hp += 20
+                player.fighter.hp = player.fighter.max_hp
+            elif level_up_stat == "str":
+                player.fighter.base_power += 1
+            elif level_up_stat == "def":
+                player.fighter.base_defense += 1
+            
+            self.game_state = self.previous_game_state
+        
+        # Handling character screen
+        if show_character_screen:
+            self.previous_game_state = self.game_state
+            self.game_state = GameStates.CHARACTER_SCREEN
+        
+        self.handle_player_turn_results(player_turn_results)
+        
+        # Managing enemy's turn
+        if self.game_state == GameStates.ENEMY_TURN:
+            self.play_enemy_turn()
+        
+        if exit_game:
+            if self.game_state in (GameStates.SHOW_INVENTORY, GameStates.DROP_INVENTORY, GameStates.CHARACTER_SCREEN):
+                self.game_state = self.previous_game_state
+            elif self.game_state == GameStates.TARGETING:
+                self.handle_player_turn_results([{'targeting_cancelled': True}])
+            else:
+                events['exit'] = True
+        
+        return events
+    
+    def handle_player_turn_results(self, player_turn_results):
+        player = self.player
+        game_map = self.game_map
+        message_log = self.message_log
+        
+        for result in player_turn_results:
+            message = result.get('message')
+            dead_entity = result.get('dead')
+            xp = result.get('xp')
+            item_added = result.get('item_added')
+            item_consumed = result.get("consumed")
+            item_dropped = result.get("item_dropped")
+            equip = result.get("equip")
+            targeting = result.get("targeting")
+            targeting_cancelled = result.get("targeting_cancelled")
+            
+            if message:
+                message_log.add_message(message)
+            
+            if dead_entity:
+                if dead_entity == player:
+                    message, self.game_state = kill_player(dead_entity, game_map)
+                    self.cause_of_death = player.name
+                else:
+                    message = kill_monster(dead_entity, game_map)
+                    self.kills += 1
+                
+                message_log.add_message(message)
+            
+            if xp:
+                leveled_up = player.level.add_xp(xp)
+                if leveled_up:
+                    message_log.add_message(Message(
+                        'Your battle skills grow stronger! You reached level {0}'.format(
+                        player.level.current_level) + '!', libtcod.yellow))
+                    
+                    self.previous_game_state = self.game_state
+                    self.game_state = GameStates.LEVEL_UP
+            
+            if item_added:
+                self.entities.remove(item_added)
+                game_map.remove_entity(item_added.x, item_added.y, item_added)
+                
+                self.game_state = GameStates.ENEMY_TURN
+            
+            if item_consumed:
+                self.game_state = GameStates.ENEMY_TURN
+            
+            if item_dropped:
+                self.entities.append(item_dropped)
+                game_map.set_entity(item_dropped.x, item_dropped.y ,item_dropped)
+                self.game_state = GameStates.ENEMY_TURN
+            
+            if equip:
+                equip_results = player.equipement.toggle_equip(equip)
+                
+                for equip_result in equip_results:
+                    equipped = equip_result.get("equipped")
+                    dequipped = equip_result.get("dequipped")
+                    
+                    if equipped:
+                        message_log.add_message(Message('You equipped the {0}'.format(equipped.name)))
+                    
+                    if dequipped:
+                        message_log.add_message(Message('You dequipped the {0}'.format(dequipped.name)))
+                
+                self.game_state = GameStates.ENEMY_TURN
+            
+            if targeting:
+                # We’re setting the game state to the player’s turn rather than the actual previous state.
+                # This is so that cancelling the targeting will not reopen the inventory screen.
+                self.previous_game_state = GameStates.PLAYERS_TURN
+                self.game_state = GameStates.TARGETING
+                
+                self.targeting_item = targeting
+                
+                message_log.add_message(targeting.item.targeting_message)
+            
+            if targeting_cancelled:
+                self.game_state = self.previous_game_state
+                message_log.add_message(Message('Targeting cancelled.'))
+    
+    def play_enemy_turn(self):
+        player = self.player
+        game_map = self.game_map
+        message_log = self.message_log
+        
+        self.turn += 1
+        
+        # The fighters moved since the last enemy turn
+        game_map.clear_flow_field()
+        
+        # Only the monsters whose next action falls in this turn act, the fast ones maybe more than once,
+        # and the ones far from the player sleep until the player comes close
+        for entity in game_map.actors.next_turn(player, self.constants['fov_radius']):
+            enemy_turn_results = []
+            enemy_attack_results = entity.ai.take_turn(player, self.entities, self.fov_map, game_map)
+            enemy_turn_results.extend(enemy_attack_results)
+            
+            self.handle_enemy_turn_results(enemy_turn_results, entity.name)
+            
+            if self.game_state == GameStates.PLAYER_DEAD:
+                break
+        else:
+            # The status effects due at the end of the turn
+            self.handle_enemy_turn_results(game_map.status_effects.update(), None)
+            
+            if self.game_state != GameStates.PLAYER_DEAD:
+                self.game_state = GameStates.PLAYERS_TURN
+    
+    def handle_enemy_turn_results(self, enemy_turn_results, attacker_name):
+        player = self.player
+        game_map = self.game_map
+        message_log = self.message_log
+        
+        for result in enemy_turn_results:
+            message = result.get('message')
+            dead_entity = result.get('dead')
+            
+            if message:
+                message_log.add_message(message)
+            
+            if dead_entity:
+                if dead_entity == player:
+                    message, self.game_state = kill_player(dead_entity, game_map)
+                    self.cause_of_death = result.get('cause', attacker_name)
+                else:
+                    message = kill_monster(dead_entity, game_map)
+                
+                message_log.add_message(message)
+                
+                if self.game_state == GameStates.PLAYER_DEAD:
+                    break
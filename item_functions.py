@@ -1,7 +1,8 @@
 import tcod as libtcod
 
 from game_messages import Message
-from components.ai import ConfusedMonster
+from status_effects import Confusion
+from map_objects.fov_functions import is_in_fov
 
 def heal(*args, **kwargs):
     entity = args[0]
@@ -21,23 +22,16 @@ def heal(*args, **kwargs):
 
 def cast_lightning(*args, **kwargs):
     caster = args[0]
-    entities = kwargs.get('entities')
+    game_map = kwargs.get('game_map')
     damage = kwargs.get('damage')
     fov_map = kwargs.get('fov_map')
     maximum_range = kwargs.get('maximum_range')
     
     results = []
     
-    target = None
-    closest_distance = maximum_range + 1
-    
-    for entity in entities:
-        if entity.fighter and entity != caster and libtcod.map_is_in_fov(fov_map, entity.x, entity.y):
-            distance = caster.distance_to(entity)
-            
-            if distance < closest_distance:
-                target = entity
-                closest_distance = distance
+    # Closest visible fighter in range, other than the caster
+    target, _ = game_map.get_nearest_entity(caster.x, caster.y, maximum_range + 1, lambda entity: (
+        entity.fighter and entity != caster and is_in_fov(fov_map, entity.x, entity.y)))
     
     if target:
         results.append({'consumed': True,
@@ -53,7 +47,7 @@ def cast_lightning(*args, **kwargs):
 
 def cast_fireball(*args, **kwargs):
     caster = args[0]
-    entities = kwargs.get('entities')
+    game_map = kwargs.get('game_map')
     fov_map = kwargs.get('fov_map')
     damage = kwargs.get('damage')
     radius = kwargs.get('radius')
@@ -62,7 +56,7 @@ def cast_fireball(*args, **kwargs):
     
     results = []
     
-    if not libtcod.map_is_in_fov(fov_map, target_x, target_y):
+    if not is_in_fov(fov_map, target_x, target_y):
         results.append({'consumed': False,
                        'message': Message('You cannot target a tile outside your field of view.', libtcod.yellow)})
         return results
@@ -70,8 +64,23 @@ def cast_fireball(*args, **kwargs):
     results.append({'consumed': True,
                     'message': Message('The fireball explodes, burning everything within {0} tiles!'.format(radius), libtcod.orange)})
     
-    for entity in entities:
-        if entity.distance(target_x, target_y) <= radius and entity.fighter:
+    if game_map.fighter_store is not None:
+        # Burn every fighter in the radius at once, on the columns of the fighter store
+        fighter_store = game_map.fighter_store
+        burned = fighter_store.in_radius(target_x, target_y, radius)
+        dead = set(fighter_store.damage(burned, damage).tolist())
+        
+        for index in burned.tolist():
+            fighter = fighter_store.fighters[index]
+            results.append({'message': Message('The {0} gets burned for {1} hit points.'.format(fighter.owner.name, damage), libtcod.orange)})
+            
+            if index in dead:
+                results.append({'dead': fighter.owner, 'xp': fighter.xp})
+        
+        return results
+    
+    for entity in game_map.get_entities_in_radius(target_x, target_y, radius):
+        if entity.fighter:
             results.append({'message': Message('The {0} gets burned for {1} hit points.'.format(entity.name, damage), libtcod.orange)})
             results.extend(entity.fighter.take_damage(damage))
     
@@ -80,27 +89,24 @@ def cast_fireball(*args, **kwargs):
 def cast_confuse(*args, **kwargs):
     NUMBER_OF_CONFUSED_TURN = 10
     
-    entities = kwargs.get('entities')
+    game_map = kwargs.get('game_map')
     fov_map = kwargs.get('fov_map')
     target_x = kwargs.get('target_x')
     target_y = kwargs.get('target_y')
     
     results = []
     
-    if not libtcod.map_is_in_fov(fov_map, target_x, target_y):
+    if not is_in_fov(fov_map, target_x, target_y):
         results.append({'consumed': False,
                        'message': Message('You cannot target a tile outside your field of view.', libtcod.yellow)})
         return results
     
-    for entity in entities:
-        if entity.x == target_x and entity.y == target_y:
-            confused_ai = ConfusedMonster(entity.ai, NUMBER_OF_CONFUSED_TURN)
-            
-            confused_ai.owner = entity
-            entity.ai = confused_ai
-            
+    for entity in game_map.get_entities(target_x, target_y):
+        if entity.ai:
+            results.extend(game_map.status_effects.add(entity, Confusion(NUMBER_OF_CONFUSED_TURN)))
             results.append({'consumed': True,
                             'message': Message('The eyes of the {0} look vacant, as he starts to stumble around!'.format(entity.name), libtcod.light_green)})
+            break
     else:
         results.append({'consumed': False,
                        'message': Message('There is no targetable enemy at that location.', libtcod.yellow)})
@@ -0,0 +1,72 @@
+import logging
+import os
+import queue
+import threading
+
+from loader_functions.data_loaders import AUTOSAVE_FILE, snapshot_game, write_temp_save
+
+# Longest wait for the autosave being written when the game closes
+CLOSE_TIMEOUT = 5
+
+
+class Autosaver:
+    """
+    Saves the game on a worker thread. The snapshot is taken on the calling thread, so the game can keep
+    changing while the worker compresses and writes it.
+    """
+    def __init__(self, path=AUTOSAVE_FILE):
+        self.path = path
+        
+        # Only the latest snapshot matters, an older one still waiting is replaced
+        self.snapshots = queue.Queue(maxsize=1)
+        
+        # Once closed, the autosave file is never replaced
+        self.closed = False
+        self.lock = threading.Lock()
+        
+        self.worker = threading.Thread(target=self.write_snapshots, name='autosave', daemon=True)
+        self.worker.start()
+        
+    def save(self, player, entities, game_map, message_log, game_state):
+        snapshot = snapshot_game(player, entities, game_map, message_log, game_state)
+        
+        try:
+            self.snapshots.get_nowait()
+        except queue.Empty:
+            pass
+        
+        self.snapshots.put(snapshot)
+        
+    def close(self):
+        # Stop the worker once the snapshot it is writing is done. A pending one is dropped, the game saves on exit anyway
+        try:
+            self.snapshots.get_nowait()
+        except queue.Empty:
+            pass
+        
+        self.snapshots.put_nowait(None)
+        self.worker.join(CLOSE_TIMEOUT)
+        
+        # A write taking longer is thrown away, it must not replace the autosave once the game saved
+        with self.lock:
+            self.closed = True
+        
+    def write_snapshots(self):
+        while True:
+            snapshot = self.snapshots.get()
+            
+            if snapshot is None:
+                break
+            
+            # A failed autosave (disk full, no permission) must not stop the next ones
+            try:
+                temp_path = write_temp_save(snapshot, self.path)
+                
+                with self.lock:
+                    if self.closed:
+                        os.remove(temp_path)
+                        break
+                    
+                    os.replace(temp_path, self.path)
+            except Exception:
+                logging.exception('Autosave to %s failed', self.path)
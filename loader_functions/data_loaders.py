@@ -1,29 +1,151 @@
-import pickle
 import os
+import zipfile
+
+import numpy as np
+import tcod as libtcod
+
+from map_objects.game_map import GameMap
+from map_objects.dungeon_store import DungeonStore
+from game_messages import Message, MessageLog
+from game_states import GameStates
+from loader_functions.entity_table import entities_to_table, table_to_entities
+from status_effects import status_effect_kinds
+
+SAVE_FILE = 'savedata.npz'
+AUTOSAVE_FILE = 'autosave.npz'
+
+# Bump when the layout of the save file changes
+SAVE_VERSION = 5
 
 def save_game(player, entities, game_map, message_log, game_state):
-    data_file = {}
-    data_file['player_index'] = entities.index(player)
-    data_file['entities'] = entities
-    data_file['game_map'] = game_map
-    data_file['game_state'] = game_state
-    data_file['message_log'] = message_log
-    
-    pickle.dump(data_file, open('savedata.dat', 'wb'))
+    write_save(snapshot_game(player, entities, game_map, message_log, game_state), SAVE_FILE)
+
+def snapshot_game(player, entities, game_map, message_log, game_state):
+    """
+    Packs the whole game state into a dict of NumPy arrays.
+    """
+    data_file = entities_to_table(entities)
+    data_file.update(map_to_arrays(game_map))
+    data_file.update(status_effects_to_arrays(game_map.status_effects, entities))
+    
+    data_file['version'] = np.array(SAVE_VERSION)
+    data_file['player_index'] = np.array(entities.index(player))
+    data_file['game_state'] = np.array(game_state.value)
+    
+    data_file['message_log_info'] = np.array([message_log.x, message_log.width, message_log.height])
+    data_file['message_text'] = np.array([message.text for message in message_log.messages], dtype=np.str_)
+    data_file['message_color'] = np.array([tuple(message.color) for message in message_log.messages], dtype=np.uint8).reshape(-1, 3)
+    
+    return data_file
+
+def write_save(data_file, path):
+    # Write next to the save file then swap it in, so a crash never leaves a half written save
+    os.replace(write_temp_save(data_file, path), path)
+
+def write_temp_save(data_file, path):
+    # Writes the save next to path and returns where, for the caller to swap it in
+    temp_path = path + '.tmp'
+    
+    with open(temp_path, 'wb') as file:
+        np.savez_compressed(file, **data_file)
+        file.flush()
+        os.fsync(file.fileno())
+    
+    return temp_path
+
+def saved_dungeon_directories():
+    # Absolute paths of the dungeon directories the save files refer to, their floors must be kept
+    directories = set()
+    
+    for path in (SAVE_FILE, AUTOSAVE_FILE):
+        try:
+            with np.load(path) as data_file:
+                directory = str(data_file['dungeon_directory'])
+        except (ValueError, KeyError, OSError, EOFError, zipfile.BadZipFile):
+            continue
         
+        if directory:
+            directories.add(os.path.abspath(directory))
+    
+    return directories
+
 def load_game():
-    if not os.path.isfile('savedata.dat'):
-        raise FileNotFoundError
+    # Load the most recent of the save and the autosave, so a crashed game resumes from its last autosave
+    save_files = [path for path in (SAVE_FILE, AUTOSAVE_FILE) if os.path.isfile(path)]
     
-    data_file = pickle.load(open('savedata.dat', 'rb'))
+    if not save_files:
+        raise FileNotFoundError
     
-    player_index = data_file['player_index']
-    entities = data_file['entities']
-    game_map = data_file['game_map']
-    game_state = data_file['game_state']
-    message_log = data_file['message_log']
+    with np.load(max(save_files, key=os.path.getmtime)) as data_file:
+        if int(data_file['version']) != SAVE_VERSION:
+            raise ValueError('Unsupported save version {0}'.format(int(data_file['version'])))
+        
+        entities = table_to_entities(data_file)
+        game_map = map_from_arrays(data_file)
+        game_state = GameStates(int(data_file['game_state']))
+        
+        x, width, height = data_file['message_log_info'].tolist()
+        message_log = MessageLog(x, width, height)
+        message_log.messages = [Message(str(text), libtcod.Color(*color.tolist()))
+                                for text, color in zip(data_file['message_text'], data_file['message_color'])]
+        
+        player = entities[int(data_file['player_index'])]
         
-    player = entities[player_index]
+        status_effects_from_arrays(game_map.status_effects, data_file, entities)
+    
+    for entity in entities:
+        game_map.set_entity(entity.x, entity.y, entity)
     
     return player, entities, game_map, message_log, game_state
-        
\ No newline at end of file
+
+def map_to_arrays(game_map):
+    # The three tile layers are packed as bits
+    tiles = np.stack([game_map.walkable, game_map.transparent, game_map.explored])
+    rng_version, rng_state, rng_gauss = game_map.rng.getstate()
+    
+    return {
+        'map_info': np.array([game_map.width, game_map.height, game_map.dungeon_level, game_map.flow_field_ai,
+                              -1 if game_map.seed is None else game_map.seed, game_map.use_fighter_store], dtype=np.int64),
+        'map_tiles': np.packbits(tiles),
+        'rng_state': np.array(rng_state, dtype=np.uint32),
+        'rng_info': np.array([rng_version, np.nan if rng_gauss is None else rng_gauss]),
+        'dungeon_directory': np.array(game_map.dungeon_store.directory if game_map.dungeon_store else ''),
+    }
+
+def map_from_arrays(data_file):
+    width, height, dungeon_level, flow_field_ai, seed, use_fighter_store = data_file['map_info'].tolist()
+    
+    # The floors left before the save are still in the dungeon store
+    dungeon_directory = str(data_file['dungeon_directory'])
+    dungeon_store = DungeonStore(dungeon_directory, width, height) if dungeon_directory else None
+    
+    game_map = GameMap(width, height, dungeon_level, bool(flow_field_ai), None if seed == -1 else seed, dungeon_store,
+                       bool(use_fighter_store))
+    
+    tiles = np.unpackbits(data_file['map_tiles'], count=3 * width * height).astype(np.bool_).reshape(3, width, height)
+    game_map.walkable[...] = tiles[0]
+    game_map.transparent[...] = tiles[1]
+    game_map.explored[...] = tiles[2]
+    game_map.cost[...] = tiles[0]
+    
+    rng_version, rng_gauss = data_file['rng_info'].tolist()
+    game_map.rng.setstate((int(rng_version), tuple(data_file['rng_state'].tolist()), None if np.isnan(rng_gauss) else rng_gauss))
+    
+    return game_map
+
+def status_effects_to_arrays(status_effects, entities):
+    # Turns are saved relative to the current turn of the scheduler
+    scheduled = status_effects.scheduled()
+    
+    return {
+        'effect_entity': np.array([entities.index(effect.entity) for _, effect in scheduled], dtype=np.int32),
+        'effect_kind': np.array([type(effect).__name__ for _, effect in scheduled], dtype=np.str_),
+        'effect_data': np.array([(effect.duration, effect.amount, effect.expires - status_effects.turn, next_turn - status_effects.turn)
+                                 for next_turn, effect in scheduled], dtype=np.int32).reshape(-1, 4),
+    }
+
+def status_effects_from_arrays(status_effects, data_file, entities):
+    for index, kind, (duration, amount, expires, next_turn) in zip(data_file['effect_entity'], data_file['effect_kind'],
+                                                                   data_file['effect_data'].tolist()):
+        effect = status_effect_kinds[str(kind)](duration, amount)
+        status_effects.restore(entities[index], effect, status_effects.turn + expires, status_effects.turn + next_turn)
@@ -0,0 +1,175 @@
+import json
+
+import numpy as np
+import tcod as libtcod
+
+import components.ai
+import item_functions
+from entity import Entity
+from components.fighter import Fighter
+from components.inventory import Inventory
+from components.item import Item
+from components.level import Level
+from components.stairs import Stairs
+from components.equipement import Equipement
+from components.equippable import Equippable
+from equipement_slots import EquipementSlots
+from render_functions import RenderOrder
+from game_messages import Message
+
+
+def entities_to_table(entities):
+    """
+    Packs entities into NumPy arrays: one row per entity for the shared attributes, and one table per
+    component holding only the entities that have it. Inventory items are stored after the entities of the list.
+    Returns a dict of arrays, ready for np.savez.
+    """
+    rows = list(entities)
+    indices = {id(entity): index for index, entity in enumerate(rows)}
+    
+    # Items carried by the entities are not in the list, they are added at the end of the table
+    for entity in entities:
+        if entity.inventory:
+            for item in entity.inventory.items:
+                if id(item) not in indices:
+                    indices[id(item)] = len(rows)
+                    rows.append(item)
+    
+    table = {
+        'entity_count': np.array(len(entities)),
+        'entity_position': np.array([(entity.x, entity.y) for entity in rows], dtype=np.int32).reshape(-1, 2),
+        'entity_char': np.array([ord(entity.char) for entity in rows], dtype=np.uint32),
+        'entity_color': np.array([tuple(entity.color) for entity in rows], dtype=np.uint8).reshape(-1, 3),
+        'entity_render_order': np.array([entity.render_order.value for entity in rows], dtype=np.uint8),
+        'entity_name': np.array([entity.name for entity in rows], dtype=np.str_),
+        'entity_speed': np.array([entity.speed for entity in rows], dtype=np.int32),
+    }
+    
+    fighters = [(index, entity.fighter) for index, entity in enumerate(rows) if entity.fighter]
+    table['fighter_entity'] = np.array([index for index, _ in fighters], dtype=np.int32)
+    table['fighter_stats'] = np.array([(fighter.hp, fighter.base_max_hp, fighter.base_defense, fighter.base_power, fighter.xp)
+                                       for _, fighter in fighters], dtype=np.int32).reshape(-1, 5)
+    
+    ais = [(index, entity.ai) for index, entity in enumerate(rows) if entity.ai]
+    table['ai_entity'] = np.array([index for index, _ in ais], dtype=np.int32)
+    table['ai_kind'] = np.array([type(ai).__name__ for _, ai in ais], dtype=np.str_)
+    table['ai_previous_kind'] = np.array([type(ai.preivous_ai).__name__ if hasattr(ai, 'preivous_ai') else ''
+                                          for _, ai in ais], dtype=np.str_)
+    
+    items = [(index, entity.item) for index, entity in enumerate(rows) if entity.item]
+    table['item_entity'] = np.array([index for index, _ in items], dtype=np.int32)
+    table['item_data'] = np.array([json.dumps(item_to_dict(item)) for _, item in items], dtype=np.str_)
+    
+    stairs = [(index, entity.stairs) for index, entity in enumerate(rows) if entity.stairs]
+    table['stairs_entity'] = np.array([index for index, _ in stairs], dtype=np.int32)
+    table['stairs_floor'] = np.array([stairs_component.floor for _, stairs_component in stairs], dtype=np.int32)
+    
+    levels = [(index, entity.level) for index, entity in enumerate(rows) if entity.level]
+    table['level_entity'] = np.array([index for index, _ in levels], dtype=np.int32)
+    table['level_data'] = np.array([(level.current_level, level.current_xp, level.level_up_base, level.level_up_factor)
+                                    for _, level in levels], dtype=np.int32).reshape(-1, 4)
+    
+    inventories = [(index, entity.inventory) for index, entity in enumerate(rows) if entity.inventory]
+    table['inventory_entity'] = np.array([index for index, _ in inventories], dtype=np.int32)
+    table['inventory_capacity'] = np.array([inventory.capacity for _, inventory in inventories], dtype=np.int32)
+    table['inventory_items'] = np.array([(index, indices[id(item)]) for index, inventory in inventories for item in inventory.items],
+                                        dtype=np.int32).reshape(-1, 2)
+    
+    equipements = [(index, entity.equipement) for index, entity in enumerate(rows) if entity.equipement]
+    table['equipement_items'] = np.array([(index, slot.value, indices[id(item)]) for index, equipement in equipements
+                                          for slot, item in equipement.equipped.items()], dtype=np.int32).reshape(-1, 3)
+    table['equipement_entity'] = np.array([index for index, _ in equipements], dtype=np.int32)
+    
+    equippables = [(index, entity.equippable) for index, entity in enumerate(rows) if entity.equippable]
+    table['equippable_entity'] = np.array([index for index, _ in equippables], dtype=np.int32)
+    table['equippable_data'] = np.array([(equippable.slot.value, equippable.power_bonus, equippable.defense_bonus, equippable.max_hp_bonus)
+                                         for _, equippable in equippables], dtype=np.int32).reshape(-1, 4)
+    
+    return table
+
+
+def table_to_entities(table):
+    """
+    Rebuilds the entities packed by entities_to_table. Returns the entities of the list (without the carried items).
+    """
+    rows = [Entity(int(x), int(y), str(name), chr(char), libtcod.Color(*color.tolist()), render_order=RenderOrder(int(render_order)),
+                   speed=int(speed))
+            for (x, y), char, color, render_order, name, speed in zip(table['entity_position'], table['entity_char'], table['entity_color'],
+                                                                      table['entity_render_order'], table['entity_name'], table['entity_speed'])]
+    
+    for index, (hp, base_max_hp, base_defense, base_power, xp) in zip(table['fighter_entity'], table['fighter_stats'].tolist()):
+        fighter = Fighter(hp=base_max_hp, defense=base_defense, power=base_power, xp=xp)
+        fighter.hp = hp
+        attach(rows[index], 'fighter', fighter)
+    
+    for index, kind, previous_kind in zip(table['ai_entity'], table['ai_kind'], table['ai_previous_kind']):
+        if previous_kind:
+            previous_ai = getattr(components.ai, str(previous_kind))()
+            previous_ai.owner = rows[index]
+            ai = getattr(components.ai, str(kind))(previous_ai)
+        else:
+            ai = getattr(components.ai, str(kind))()
+        attach(rows[index], 'ai', ai)
+    
+    for index, item_data in zip(table['item_entity'], table['item_data']):
+        attach(rows[index], 'item', item_from_dict(json.loads(str(item_data))))
+    
+    for index, floor in zip(table['stairs_entity'], table['stairs_floor']):
+        attach(rows[index], 'stairs', Stairs(int(floor)))
+    
+    for index, (current_level, current_xp, level_up_base, level_up_factor) in zip(table['level_entity'], table['level_data'].tolist()):
+        attach(rows[index], 'level', Level(current_level, current_xp, level_up_base, level_up_factor))
+    
+    for index, capacity in zip(table['inventory_entity'], table['inventory_capacity']):
+        inventory = Inventory(int(capacity))
+        attach(rows[index], 'inventory', inventory)
+    
+    for holder, item in table['inventory_items'].tolist():
+        rows[holder].inventory.items.append(rows[item])
+    
+    for index, (slot, power_bonus, defense_bonus, max_hp_bonus) in zip(table['equippable_entity'], table['equippable_data'].tolist()):
+        attach(rows[index], 'equippable', Equippable(EquipementSlots(slot), power_bonus=power_bonus, defense_bonus=defense_bonus,
+                                                     max_hp_bonus=max_hp_bonus))
+    
+    for index in table['equipement_entity']:
+        attach(rows[index], 'equipement', Equipement())
+    
+    for holder, slot, item in table['equipement_items'].tolist():
+        rows[holder].equipement.toggle_equip(rows[item])
+    
+    return rows[:int(table['entity_count'])]
+
+
+def attach(entity, name, component):
+    setattr(entity, name, component)
+    component.owner = entity
+
+
+def item_to_dict(item):
+    return {
+        'use_function': item.use_function.__name__ if item.use_function else None,
+        'targeting': item.targeting,
+        'targeting_message': message_to_dict(item.targeting_message),
+        'function_kwargs': item.function_kwargs,
+    }
+
+
+def item_from_dict(data):
+    use_function = getattr(item_functions, data['use_function']) if data['use_function'] else None
+    
+    return Item(use_function=use_function, targeting=data['targeting'],
+                targeting_message=message_from_dict(data['targeting_message']), **data['function_kwargs'])
+
+
+def message_to_dict(message):
+    if message is None:
+        return None
+    
+    return {'text': message.text, 'color': list(message.color)}
+
+
+def message_from_dict(data):
+    if data is None:
+        return None
+    
+    return Message(data['text'], libtcod.Color(*data['color']))
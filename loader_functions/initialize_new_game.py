@@ -1,7 +1,9 @@
+import random
 import tcod as libtcod
 
 from entity import Entity
 from map_objects.game_map import GameMap
+from map_objects.dungeon_store import DungeonStore, new_dungeon_directory, prune_dungeons
 from components.fighter import Fighter
 from components.inventory import Inventory
 from components.level import Level
@@ -11,6 +13,7 @@ from equipement_slots import EquipementSlots
 from render_functions import RenderOrder
 from game_messages import MessageLog
 from game_states import GameStates
+from loader_functions.data_loaders import saved_dungeon_directories
 
 
 def get_constants():
@@ -40,6 +43,24 @@ def get_constants():
     max_monsters_per_room = 3
     max_items_per_room = 5
     
+    # One of 'rooms', 'bsp', 'caves' and 'drunkard_walk' (see map_objects/map_generators.py)
+    map_generator = 'rooms'
+    
+    # AI config
+    # Chasing monsters share one Dijkstra map toward the player instead of each running A*
+    flow_field_ai = False
+    
+    # Positions, hit points and stats of the fighters are kept in NumPy columns, for spells hitting many fighters at once
+    fighter_store = False
+    
+    # Autosave config
+    # Number of turns between two autosaves, the game is also autosaved on every new floor
+    autosave_interval = 50
+    
+    # Dungeon config
+    # Directory where the floors the player left are kept, None to throw them away (no stairs up)
+    dungeon_directory = 'dungeon'
+    
     # FOV config
     fov_algorithm = 0
     fov_radius = 8
@@ -68,6 +89,11 @@ def get_constants():
         'room_max_size': room_max_size,
         'room_min_size': room_min_size,
         'max_rooms': max_rooms,
+        'map_generator': map_generator,
+        'flow_field_ai': flow_field_ai,
+        'fighter_store': fighter_store,
+        'autosave_interval': autosave_interval,
+        'dungeon_directory': dungeon_directory,
         'fov_algorithm': fov_algorithm,
         'fov_light_walls': fov_light_walls,
         'fov_radius': fov_radius,
@@ -76,7 +102,7 @@ def get_constants():
     
     return constants
 
-def get_game_variables(constants):
+def get_game_variables(constants, seed=None):
     # Components
     fighter_component = Fighter(hp=100, defense=2, power=5)
     inventory_component = Inventory(26)
@@ -95,9 +121,24 @@ def get_game_variables(constants):
     player.inventory.add_item(dagger)
     player.equipement.toggle_equip(dagger)
     
-    game_map = GameMap(constants['map_width'], constants['map_height'])
+    # A random seed is picked when none is given, so that every game can be replayed
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    
+    # A new game starts from an empty dungeon store, in a directory of its own. The floors of the games
+    # no save refers to any more are deleted
+    dungeon_store = None
+    
+    if constants['dungeon_directory']:
+        prune_dungeons(constants['dungeon_directory'], saved_dungeon_directories())
+        
+        dungeon_store = DungeonStore(new_dungeon_directory(constants['dungeon_directory']),
+                                     constants['map_width'], constants['map_height'])
+    
+    game_map = GameMap(constants['map_width'], constants['map_height'], flow_field_ai=constants['flow_field_ai'], seed=seed,
+                       dungeon_store=dungeon_store, use_fighter_store=constants['fighter_store'])
     game_map.make_map(constants['room_min_size'], constants['room_max_size'], constants['max_rooms'],
-                      constants['map_width'], constants['map_height'], player, entities)
+                      constants['map_width'], constants['map_height'], player, entities, constants['map_generator'])
     
     # Message Log init
     message_log = MessageLog(constants['message_x'], constants['message_width'], constants['message_height'])
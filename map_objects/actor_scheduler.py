@@ -0,0 +1,136 @@
+import heapq
+import itertools
+
+# Time of one player turn, an actor of speed 100 acts once per turn, 200 twice, 50 every other turn
+TURN_TIME = 100
+
+# Side of the squares of the map in which the dormant actors are filed
+SECTOR_SIZE = 16
+
+# Tiles beyond the sight radius in which actors stay awake: the field of view the monsters look at
+# dates from before the player moved, and they move during the turn
+WAKE_MARGIN = 2
+
+
+class ActorScheduler:
+    """
+    The entities with an AI on a floor, grouped by the time of their next action, with a heap of these times.
+    The enemy turn only takes the actors whose time has come, instead of sweeping every entity.
+    
+    Actors far away from the player, that would do nothing, are parked in sectors of the map instead of being
+    scheduled, and woken when the player comes close to their sector.
+    """
+    def __init__(self):
+        self.time = 0
+        
+        # Actor -> its sequence number. Actors due at the same time act in the order they were added, like the old
+        # sweep of the entities, so the order of a turn doesn't depend on which actors slept before it
+        self.actors = {}
+        self.sequence = itertools.count()
+        
+        # Time -> heap of (sequence number, actor) acting at that time
+        self.buckets = {}
+        self.times = []
+        
+        # Sector -> dormant actors in it, with their sequence number and the time of the next action they skip.
+        # In a dict rather than a set so they wake in the order they were parked
+        self.dormant = {}
+    
+    def add(self, entity):
+        if entity in self.actors:
+            return
+        
+        self.actors[entity] = next(self.sequence)
+        self.schedule(entity, self.time + self.delay(entity))
+    
+    def remove(self, entity):
+        # It stays in its bucket or sector, and is skipped when its time comes or when it is woken
+        self.actors.pop(entity, None)
+    
+    def next_turn(self, player, sight_radius):
+        # Advances the time by one turn, and yields the actors acting during it, in the order of their actions
+        self.time += TURN_TIME
+        
+        # A sight radius of 0 or less is unlimited in libtcod, no actor is too far to see the player then
+        radius = sight_radius + WAKE_MARGIN if sight_radius > 0 else None
+        
+        if radius is None:
+            self.wake_all()
+        else:
+            self.wake(player.x, player.y, radius)
+        
+        while self.times and self.times[0] <= self.time:
+            time = self.times[0]
+            bucket = self.buckets[time]
+            
+            if not bucket:
+                heapq.heappop(self.times)
+                del self.buckets[time]
+                continue
+            
+            # Actors are taken one at a time, so the ones left when the turn is interrupted act on the next one
+            sequence, entity = heapq.heappop(bucket)
+            
+            # Removed, or removed then added again with a new sequence number
+            if self.actors.get(entity) != sequence:
+                continue
+            
+            if radius is not None and entity.ai.dormant_when_far and max(abs(entity.x - player.x), abs(entity.y - player.y)) > radius:
+                self.park(entity, time + self.delay(entity))
+                continue
+            
+            self.schedule(entity, time + self.delay(entity))
+            yield entity
+    
+    def wake(self, x, y, radius):
+        # Schedules the dormant actors at most radius tiles away from (x, y)
+        for sector_x in range((x - radius) // SECTOR_SIZE, (x + radius) // SECTOR_SIZE + 1):
+            for sector_y in range((y - radius) // SECTOR_SIZE, (y + radius) // SECTOR_SIZE + 1):
+                sleepers = self.dormant.get((sector_x, sector_y))
+                
+                if not sleepers:
+                    continue
+                
+                for entity, (sequence, time) in list(sleepers.items()):
+                    if self.actors.get(entity) != sequence:
+                        del sleepers[entity]
+                    elif max(abs(entity.x - x), abs(entity.y - y)) <= radius:
+                        del sleepers[entity]
+                        self.schedule(entity, self.wake_time(entity, time))
+    
+    def wake_all(self):
+        for sleepers in self.dormant.values():
+            for entity, (sequence, time) in sleepers.items():
+                if self.actors.get(entity) == sequence:
+                    self.schedule(entity, self.wake_time(entity, time))
+        
+        self.dormant.clear()
+    
+    def wake_time(self, entity, time):
+        # The time of its first action in the current turn or after, had the actor kept skipping its actions while asleep
+        start = self.time - TURN_TIME
+        
+        if time > start:
+            return time
+        
+        delay = self.delay(entity)
+        
+        return time + ((start - time) // delay + 1) * delay
+    
+    def park(self, entity, time):
+        # A dormant actor doesn't move, so it stays in the sector it was parked in
+        sector = (entity.x // SECTOR_SIZE, entity.y // SECTOR_SIZE)
+        self.dormant.setdefault(sector, {})[entity] = (self.actors[entity], time)
+    
+    def schedule(self, entity, time):
+        bucket = self.buckets.get(time)
+        
+        if bucket is None:
+            bucket = self.buckets[time] = []
+            heapq.heappush(self.times, time)
+        
+        heapq.heappush(bucket, (self.actors[entity], entity))
+    
+    @staticmethod
+    def delay(entity):
+        return TURN_TIME * 100 // entity.speed
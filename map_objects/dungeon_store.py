@@ -0,0 +1,104 @@
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from loader_functions.entity_table import entities_to_table, table_to_entities
+
+# Bits of a stored tile
+WALKABLE = 1
+TRANSPARENT = 2
+EXPLORED = 4
+
+
+class DungeonStore:
+    """
+    Keeps the visited floors of a dungeon on disk, so they can be revisited without holding them in memory:
+    the tiles of every floor in one memory-mapped file, and the entities of each floor in its own table file.
+    """
+    def __init__(self, directory, width, height):
+        self.directory = directory
+        self.width = width
+        self.height = height
+        self.tiles_path = os.path.join(directory, 'floors.dat')
+        self.tiles = None
+        
+        os.makedirs(directory, exist_ok=True)
+        
+        if os.path.isfile(self.tiles_path):
+            self.map_tiles()
+    
+    def has_floor(self, floor):
+        return os.path.isfile(self.entities_path(floor))
+    
+    def store_floor(self, game_map, entities):
+        floor = game_map.dungeon_level
+        self.reserve(floor)
+        
+        self.tiles[floor - 1] = (game_map.walkable * WALKABLE) | (game_map.transparent * TRANSPARENT) | (game_map.explored * EXPLORED)
+        self.tiles.flush()
+        
+        with open(self.entities_path(floor), 'wb') as file:
+            np.savez(file, **entities_to_table(entities))
+    
+    def load_floor(self, game_map):
+        """
+        Pages the floor game_map.dungeon_level back into game_map, and returns its entities.
+        """
+        tiles = self.tiles[game_map.dungeon_level - 1]
+        
+        game_map.initialize_tiles()
+        game_map.walkable[...] = tiles & WALKABLE
+        game_map.transparent[...] = tiles & TRANSPARENT
+        game_map.explored[...] = tiles & EXPLORED
+        game_map.cost[...] = game_map.walkable
+        
+        with np.load(self.entities_path(game_map.dungeon_level)) as table:
+            entities = table_to_entities(table)
+        
+        for entity in entities:
+            game_map.set_entity(entity.x, entity.y, entity)
+        
+        return entities
+    
+    def reserve(self, floor):
+        # Grow the tiles file so that it holds at least this many floors
+        floor_size = self.width * self.height
+        
+        if self.tiles is not None and len(self.tiles) >= floor:
+            return
+        
+        # The memory map has to be closed before the file is resized
+        self.tiles = None
+        
+        with open(self.tiles_path, 'ab') as file:
+            file.truncate(floor * floor_size)
+        
+        self.map_tiles()
+    
+    def map_tiles(self):
+        floors = os.path.getsize(self.tiles_path) // (self.width * self.height)
+        self.tiles = np.memmap(self.tiles_path, dtype=np.uint8, mode='r+', shape=(floors, self.width, self.height), order='C')
+    
+    def entities_path(self, floor):
+        return os.path.join(self.directory, 'floor_{0}.npz'.format(floor))
+
+
+def new_dungeon_directory(root):
+    # Every game keeps its floors in its own directory, so a new game never overwrites the floors of a saved one
+    os.makedirs(root, exist_ok=True)
+    
+    return tempfile.mkdtemp(prefix='game_', dir=root)
+
+
+def prune_dungeons(root, keep):
+    # Deletes the game directories under root that are not in keep (absolute paths), the saves don't refer to them any more
+    if not os.path.isdir(root):
+        return
+    
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        
+        if name.startswith('game_') and os.path.isdir(path) and os.path.abspath(path) not in keep:
+            shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,68 @@
+import numpy as np
+
+
+class FighterStore:
+    """
+    Struct-of-arrays storage for the fighters of a floor: positions, hit points and base stats live in NumPy
+    columns indexed by fighter id. A Fighter added to the store becomes a view of its row, so bulk operations
+    (like damaging every fighter around a point) work on whole columns.
+    """
+    STATS = ('hp', 'base_max_hp', 'base_defense', 'base_power', 'xp')
+    
+    def __init__(self, capacity=64):
+        self.count = 0
+        self.fighters = []
+        
+        self.x = np.zeros(capacity, dtype=np.int32)
+        self.y = np.zeros(capacity, dtype=np.int32)
+        self.hp = np.zeros(capacity, dtype=np.int32)
+        self.base_max_hp = np.zeros(capacity, dtype=np.int32)
+        self.base_defense = np.zeros(capacity, dtype=np.int32)
+        self.base_power = np.zeros(capacity, dtype=np.int32)
+        self.xp = np.zeros(capacity, dtype=np.int32)
+        
+        # Fighters standing on the map (dead monsters and fighters being moved are not)
+        self.on_map = np.zeros(capacity, dtype=np.bool_)
+    
+    def add(self, fighter):
+        # Copy the stats of the fighter (held by itself or by another store) into a new row, then make it a view of that row
+        stats = [getattr(fighter, name) for name in self.STATS]
+        
+        if self.count == len(self.x):
+            self.grow()
+        
+        index = self.count
+        self.count += 1
+        self.fighters.append(fighter)
+        
+        for name, value in zip(self.STATS, stats):
+            getattr(self, name)[index] = value
+        
+        fighter.store = self
+        fighter.index = index
+    
+    def place(self, fighter, x, y):
+        self.x[fighter.index] = x
+        self.y[fighter.index] = y
+        self.on_map[fighter.index] = True
+    
+    def lift(self, fighter):
+        self.on_map[fighter.index] = False
+    
+    def in_radius(self, x, y, radius):
+        # Ids of the fighters on the map at a distance of at most radius from (x, y)
+        count = self.count
+        distance_squared = (self.x[:count] - x) ** 2 + (self.y[:count] - y) ** 2
+        
+        return np.flatnonzero(self.on_map[:count] & (distance_squared <= radius ** 2))
+    
+    def damage(self, indices, amount):
+        # Damage many fighters at once, returns the ids of the ones that died
+        self.hp[indices] = np.maximum(self.hp[indices] - amount, 0)
+        
+        return indices[self.hp[indices] == 0]
+    
+    def grow(self):
+        for name in ('x', 'y', 'on_map') + self.STATS:
+            column = getattr(self, name)
+            setattr(self, name, np.concatenate([column, np.zeros_like(column)]))
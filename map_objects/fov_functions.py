@@ -1,16 +1,29 @@
+from __future__ import annotations
+import numpy as np
 import tcod as libtcod
 
-from map_objects.game_map import GameMap
-
 def initialize_fov(game_map: GameMap) -> libtcod.map.Map:
-    fov_map = libtcod.map.Map(game_map.width, game_map.height)
-    
-    for y in range(game_map.height):
-        for x in range(game_map.width):
-            fov_map.transparent[y][x] = not game_map.tiles[x][y].block_sight
-            fov_map.walkable[y][x] = not game_map.tiles[x][y].blocked
-    
-    return fov_map
+    # The game map tiles are stored directly in its FOV map, so there is nothing to copy
+    return game_map.fov_map
             
 def recompute_fov(fov_map, x, y, fov_algorithm=0, fov_radius=5, fov_light_walls=True):
-    libtcod.map_compute_fov(fov_map, x, y, fov_radius, fov_light_walls, fov_algorithm)
\ No newline at end of file
+    libtcod.map_compute_fov(fov_map, x, y, fov_radius, fov_light_walls, fov_algorithm)
+
+def visible_mask(fov_map) -> np.ndarray:
+    # Tiles lit by the last FOV recompute, indexed [x, y]. It is a view of the FOV map, so it follows the recomputes
+    return fov_map.fov
+
+def is_in_fov(fov_map, x, y) -> bool:
+    # Looks the tile up in the mask rather than going through the C wrapper, tiles out of the map are never seen
+    return 0 <= x < fov_map.width and 0 <= y < fov_map.height and bool(fov_map.fov[x, y])
+
+def in_fov(fov_map, xs, ys) -> np.ndarray:
+    # Which of the tiles (xs[i], ys[i]) are seen, with a single fancy-indexing lookup in the mask
+    xs = np.asarray(xs)
+    ys = np.asarray(ys)
+    inside = (0 <= xs) & (xs < fov_map.width) & (0 <= ys) & (ys < fov_map.height)
+    
+    seen = np.zeros(xs.shape, dtype=np.bool_)
+    seen[inside] = visible_mask(fov_map)[xs[inside], ys[inside]]
+    
+    return seen
@@ -1,208 +1,344 @@
 from __future__ import annotations
+import numpy as np
 import tcod as libtcod
-from random import randint
+from random import Random
+from concurrent.futures import ThreadPoolExecutor
 
 
-from map_objects.tile import Tile
+from map_objects.tile import TileGrid
 from map_objects.rectangle import Rect
+from map_objects.map_generators import map_generators
+from map_objects.spatial_index import SpatialIndex
+from map_objects.fighter_store import FighterStore
+from map_objects.actor_scheduler import ActorScheduler
+from status_effects import StatusEffects
 from entity import Entity
-from components.fighter import Fighter
-from components.ai import BasicMonster
-from components.item import Item
 from components.stairs import Stairs
-from components.equippable import Equippable
-from equipement_slots import EquipementSlots
 from render_functions import RenderOrder
-from item_functions import heal, cast_lightning, cast_fireball, cast_confuse
 from game_messages import Message
-from random_utils import random_choice_from_dict, from_dungeon_level
+from random_utils import random_choices_from_dict, from_dungeon_level
+from spawn_functions import load_prototypes
+
+# Builds the next floor in the background while the player explores the current one
+floor_generator = ThreadPoolExecutor(max_workers=1)
 
 
 class GameMap:
-    def __init__(self, width, height, dungeon_level=1):
+    def __init__(self, width, height, dungeon_level=1, flow_field_ai=False, seed=None, dungeon_store=None, use_fighter_store=False):
         self.width = width
         self.height = height
         self.dungeon_level = dungeon_level
-        self.tiles = self.initialize_tiles()
+        self.flow_field_ai = flow_field_ai
+        
+        # Keep the fighters of the floor in a FighterStore, for the operations on many fighters at once
+        self.use_fighter_store = use_fighter_store
+        
+        # Keeps the floors the player left, so they can be revisited (None when floors are thrown away)
+        self.dungeon_store = dungeon_store
+        
+        # Every random draw of the game (map generation, spawns, AI) comes from this generator, so a seed replays a whole run
+        self.seed = seed
+        self.rng = Random(seed)
+        
+        # The FOV map owns the walkable and transparent buffers of the map, so it never needs to be rebuilt
+        self.fov_map = libtcod.map.Map(width, height, order='F')
+        self.initialize_tiles()
+        
+        # Timed effects on the entities (confusion, poison...)
+        self.status_effects = StatusEffects()
+        
+        # Floor being generated in the background, and its number
+        self.pregenerated = None
+        self.pregenerated_floor = None
 
     def initialize_tiles(self):
-        tiles = [[Tile(True) for y in range(self.height)] for x in range(self.width)]
-
-        return tiles
+        # Every tile starts as a wall, the buffers are reset in place so the FOV map stays valid
+        self.walkable[...] = False
+        self.transparent[...] = False
+        self.explored = np.zeros((self.width, self.height), dtype=np.bool_, order='F')
+        
+        # Pathfinding grid: number of fighters on each tile, and the resulting A* cost (0 means blocked)
+        self.blockers = np.zeros((self.width, self.height), dtype=np.int8, order='F')
+        self.cost = np.zeros((self.width, self.height), dtype=np.int8, order='F')
+        self.clear_flow_field()
+        
+        # Entities of the floor, indexed by position
+        self.entity_index = SpatialIndex(self.width, self.height)
+        self.fighter_store = FighterStore() if self.use_fighter_store else None
+        
+        # Entities with an AI, by time of their next action
+        self.actors = ActorScheduler()
+        
+        # Tiles where entities appeared, left or changed since the last render
+        self.dirty_tiles = set()
+        
+    @property
+    def walkable(self):
+        # [x, y] view of the FOV map walkable buffer
+        return self.fov_map.walkable
+    
+    @property
+    def transparent(self):
+        # [x, y] view of the FOV map transparent buffer
+        return self.fov_map.transparent
+        
+    @property
+    def tiles(self):
+        # Tile-like view for code that still uses game_map.tiles[x][y]
+        return TileGrid(self)
     
     def is_blocked(self, x, y):
-        if self.tiles[x][y].blocked:
-            return True
-        return False
+        return not self.walkable[x, y]
     
     def get_entities(self, x, y):
-        return self.tiles[x][y].entities
+        return self.entity_index.at(x, y)
+    
+    def get_entities_in_radius(self, x, y, radius):
+        return self.entity_index.in_radius(x, y, radius)
+    
+    def get_nearest_entity(self, x, y, max_distance=None, predicate=None):
+        return self.entity_index.nearest(x, y, max_distance, predicate)
         
     def set_entity(self, x, y, entity):
-        self.tiles[x][y].entities.append(entity)
+        self.entity_index.add(entity, x, y)
+        self.dirty_tiles.add((x, y))
+        
+        if entity.ai:
+            self.actors.add(entity)
+        
+        # Fighters block the tile for pathfinding
+        if entity.fighter:
+            self.blockers[x, y] += 1
+            self.cost[x, y] = 0
+            
+            # Fighters coming from another floor (the player) move into the store of this one
+            if self.fighter_store is not None:
+                if entity.fighter.store is not self.fighter_store:
+                    self.fighter_store.add(entity.fighter)
+                
+                self.fighter_store.place(entity.fighter, x, y)
         
     def remove_entity(self, x, y, entity):
-        self.tiles[x][y].entities.remove(entity)
+        self.entity_index.remove(entity, x, y)
+        self.dirty_tiles.add((x, y))
+            
+        if entity.fighter:
+            self.blockers[x, y] -= 1
+            self.cost[x, y] = self.walkable[x, y] and self.blockers[x, y] == 0
+            
+            if self.fighter_store is not None:
+                self.fighter_store.lift(entity.fighter)
+            
+    def get_flow_field(self, target):
+        # A single Dijkstra map toward the target, computed once and shared by all the chasing monsters
+        if self.flow_field is None or self.flow_field_target != (target.x, target.y):
+            self.flow_field = libtcod.path.maxarray((self.width, self.height), order='F')
+            self.flow_field[target.x, target.y] = 0
+            
+            # Every step costs 1, so the distances are numbers of steps
+            libtcod.path.dijkstra2d(self.flow_field, self.cost, 1, 1, out=self.flow_field)
+            self.flow_field_target = (target.x, target.y)
+            
+        return self.flow_field
+    
+    def clear_flow_field(self):
+        # Called when the fighters moved, the next get_flow_field will compute a new one
+        self.flow_field = None
+        self.flow_field_target = None
+            
+    def carve(self, *index):
+        # Make the tiles at the given index (x and y ints or slices, or a mask of the map) passable
+        self.walkable[index] = True
+        self.transparent[index] = True
+        self.cost[index] = self.blockers[index] == 0
+    
+    def carve_mask(self, mask):
+        # Same as carve with a mask of the whole map, but combines the arrays instead of indexing them with the mask
+        np.logical_or(self.walkable, mask, out=self.walkable)
+        np.logical_or(self.transparent, mask, out=self.transparent)
+        np.copyto(self.cost, self.blockers == 0, where=mask)
     
     def create_room(self, room: Rect):
-        # Go through the tiles in the rectangle and make them passable
-        for y in range(room.y1 + 1, room.y2):
-            for x in range(room.x1 + 1, room.x2):
-                self.tiles[x][y].blocked = False
-                self.tiles[x][y].block_sight = False
+        # Make the tiles inside the rectangle passable
+        self.carve(*room.inner_slices())
     
     def create_h_tunnel(self, x1, x2, y):
-        for x in range(min(x1, x2), max(x1, x2) + 1):
-            self.tiles[x][y].blocked = False
-            self.tiles[x][y].block_sight = False
+        self.carve(slice(min(x1, x2), max(x1, x2) + 1), y)
     
     def create_v_tunnel(self, y1, y2, x):
-        for y in range(min(y1, y2), max(y1, y2) + 1):
-            self.tiles[x][y].blocked = False
-            self.tiles[x][y].block_sight = False
-                
+        self.carve(x, slice(min(y1, y2), max(y1, y2) + 1))
+    
     def make_map(self, room_min_size, room_max_size, max_rooms,
-                 map_width, map_height, player, entities):
-        rooms = []
-        num_rooms = 0
-        
-        center_of_last_room_x = None
-        center_of_last_room_y = None
-        
-        for r in range(max_rooms):
-            w = randint(room_min_size, room_max_size)
-            h = randint(room_min_size, room_max_size)
-            x = randint(0, map_width - w - 1)
-            y = randint(0, map_height - h - 1)
-            new_room = Rect(x, y, w , h)
+                 map_width, map_height, player, entities, map_generator='rooms'):
+        # The generators fill the whole GameMap, whose size may differ from map_width and map_height
+        rooms = map_generators[map_generator](self, room_min_size, room_max_size, max_rooms)
+        
+        # The first room is where the player starts at
+        (new_x, new_y) = rooms[0].center()
+        self.player_start = (new_x, new_y)
+        
+        # A floor generated in the background has no player yet
+        if player:
+            player.x = new_x
+            player.y = new_y
             
-            # Run through the other rooms and see if they intersect with this one
-            for other_room in rooms:
-                if new_room.intersect(other_room):
-                    break 
-            else:
-                self.create_room(new_room)
-                
-                # Center coordinates of new room, will be useful later
-                (new_x, new_y) = new_room.center()
-                
-                center_of_last_room_x = new_x
-                center_of_last_room_y = new_y
-
-                if num_rooms == 0:
-                    # This is the first room, where the player starts at
-                    player.x = new_x
-                    player.y = new_y
-                    
-                    # Add player to tile entities
-                    self.set_entity(player.x, player.y, player)
-                else:
-                    # all rooms after the first:
-                    # connect it to the previous room with a tunnel
-                    (prev_x, prev_y) = rooms[-1].center()
-                    
-                    # flip a coin (random number that is either 0 or 1)
-                    if randint(0, 1) == 1:
-                        # first move horizontally, then vertically
-                        self.create_h_tunnel(prev_x, new_x, prev_y)
-                        self.create_v_tunnel(prev_y, new_y, new_x)
-                    else:
-                        # first move vertically, then horizontally
-                        self.create_v_tunnel(prev_y, new_y, prev_x)
-                        self.create_h_tunnel(prev_x, new_x, new_y)
-                
-                self.place_entities(entities, new_room)
-                rooms.append(new_room)
-                num_rooms += 1   
-                
+            # Add player to tile entities
+            self.set_entity(player.x, player.y, player)
+        
+        # Stairs back to the previous floor, under the player
+        if self.dungeon_store and self.dungeon_level > 1:
+            up_stairs = Entity(new_x, new_y, 'Stairs', '<', libtcod.white,
+                               stairs=Stairs(self.dungeon_level - 1), render_order=RenderOrder.STAIRS)
+            self.set_entity(up_stairs.x, up_stairs.y, up_stairs)
+            entities.append(up_stairs)
+        
+        self.place_entities(entities, rooms)
+        
+        (center_of_last_room_x, center_of_last_room_y) = rooms[-1].center()
+        
         # Placing the stairs to next level
         stairs_component = Stairs(self.dungeon_level + 1)
         stairs = Entity(center_of_last_room_x, center_of_last_room_y, 'Stairs', '>', libtcod.white,
                         stairs=stairs_component, render_order=RenderOrder.STAIRS)
+        self.set_entity(stairs.x, stairs.y, stairs)
         entities.append(stairs)  
     
-    def place_entities(self, entities: List, room: Rect):
+    def place_entities(self, entities: List, rooms: List[Rect]):
+        # Spawns the monsters and items of all the rooms of the floor in one go
         max_monsters_per_room = from_dungeon_level([[2, 1], [3, 4], [5, 6]], self.dungeon_level)
         max_items_per_room = from_dungeon_level([[1, 1], [2, 4]], self.dungeon_level)
         
-        monster_chances = {'orc': 80,
-                           'troll': 20
-                           }
-        item_chances = {'sword': from_dungeon_level([[5, 4]], self.dungeon_level),
-                        'shield': from_dungeon_level([[15, 8]], self.dungeon_level),
-                        'healing_potion': 70,
-                        'lightning_scroll': 10,
-                        'fireball_scroll': 10,
-                        'confusion_scroll': 10,
-                        }
-        
-        # Placing random monsters
-        for i in range(max_monsters_per_room):
-            x = randint(room.x1 + 1, room.x2 - 1)
-            y = randint(room.y1 + 1, room.y2 - 1)
-            
-            if len(self.get_entities(x, y)) == 0:
-                monster_choice = random_choice_from_dict(monster_chances)
-                # Probability of 80% to spawn Orc and 20% for Troll
-                if monster_choice == 'orc':
-                    fighter_component = Fighter(hp=10, defense=0, power=4, xp=35)
-                    ai_component = BasicMonster()
-                    monster = Entity(x, y, "Orc", "o", libtcod.dark_green, fighter_component, ai_component, render_order=RenderOrder.ACTOR)
-                else:
-                    fighter_component = Fighter(hp=16, defense=1, power=8, xp=100)
-                    ai_component = BasicMonster()
-                    monster = Entity(x, y, "Troll", "T", libtcod.orange, fighter_component, ai_component, render_order=RenderOrder.ACTOR)
-                
-                # Add the monster as an entity property of the tile to check for blocking movement
-                # self.tiles[x][y].entity = monster
-                self.set_entity(x, y, monster)
-                
-                entities.append(monster)
+        # The chances of every template at this dungeon level (see resources/entities.json)
+        prototypes = load_prototypes()
+        monster_chances = {key: from_dungeon_level(prototype.chances, self.dungeon_level)
+                           for key, prototype in prototypes.items() if prototype.spawn_kind == 'monster'}
+        item_chances = {key: from_dungeon_level(prototype.chances, self.dungeon_level)
+                        for key, prototype in prototypes.items() if prototype.spawn_kind == 'item'}
+        
+        random = np.random.default_rng(self.rng.getrandbits(64))
+        
+        # Every spawn attempt of the floor at once, monsters first then items: its room, its tile inside the room and its choice
+        room_index = np.concatenate([np.repeat(np.arange(len(rooms)), max_monsters_per_room),
+                                     np.repeat(np.arange(len(rooms)), max_items_per_room)])
+        bounds = np.array([(room.x1, room.y1, room.x2, room.y2) for room in rooms]).reshape(-1, 4)[room_index]
         
-        # Placing random items
-        for i in range(max_items_per_room):
-            x = randint(room.x1 + 1, room.x2 - 1)
-            y = randint(room.y1 + 1, room.y2 - 1)
+        xs = random.integers(bounds[:, 0] + 1, bounds[:, 2])
+        ys = random.integers(bounds[:, 1] + 1, bounds[:, 3])
+        choices = (random_choices_from_dict(monster_chances, len(rooms) * max_monsters_per_room, random) +
+                   random_choices_from_dict(item_chances, len(rooms) * max_items_per_room, random))
+        
+        # Tiles where nothing can spawn: walls, tiles already holding an entity, and the start of the player
+        # (a floor generated in the background has no player on it yet)
+        free = self.walkable.copy()
+        free[self.player_start] = False
+        
+        for (x, y) in self.entity_index.cells:
+            free[x, y] = False
+        
+        # Only the first attempt on each free tile spawns something
+        _, first = np.unique(xs * self.height + ys, return_index=True)
+        first.sort()
+        first = first[free[xs[first], ys[first]]]
+        
+        for index in first.tolist():
+            x, y = int(xs[index]), int(ys[index])
+            entity = prototypes[choices[index]].spawn(x, y, self)
             
-            if len(self.get_entities(x, y)) == 0:
-                item_choice = random_choice_from_dict(item_chances)
-                
-                if item_choice == 'sword':
-                    equippable_component = Equippable(EquipementSlots.MAIN_HAND, power_bonus=3)
-                    item = Entity(x, y, 'Sword', '-', libtcod.sky, equippable=equippable_component)
-                elif item_choice == 'shield':
-                    equippable_component = Equippable(EquipementSlots.OFF_HAND, defense_bonus=1)
-                    item = Entity(x, y, 'Shield', ']', libtcod.darker_orange, equippable=equippable_component)
-                elif item_choice == 'healing_potion':
-                    item_component = Item(use_function=heal, amount=40)
-                    item = Entity(x, y, 'Healing Potion', '!', libtcod.violet, item=item_component, render_order=RenderOrder.ITEM)
-                elif item_choice == 'fireball_scroll':
-                    item_component = Item(use_function=cast_fireball, targeting=True, targeting_message=Message(
-                        'Left-click a target tile for the fireball, or right-click to cancel.', libtcod.light_cyan), damage=25, radius=3)
-                    item = Entity(x, y, 'Fireball Scroll', '#', libtcod.red, item=item_component, render_order=RenderOrder.ITEM)
-                elif item_choice == 'confusion_scroll':
-                    item_component = Item(use_function=cast_confuse, targeting=True, targeting_message=Message(
-                        'Left-click an enemy to confuse it, or right-click to cancel.', libtcod.light_cyan), radius=3)
-                    item = Entity(x, y, 'Confusion Scroll', '#', libtcod.light_pink, item=item_component, render_order=RenderOrder.ITEM)
-                else:
-                    item_component = Item(use_function=cast_lightning, damage=40, maximum_range=5)
-                    item = Entity(x, y, 'Lightning Scroll', '#', libtcod.yellow, item=item_component, render_order=RenderOrder.ITEM)
-                    
-                # Add item as an entity property of the tile
-                self.set_entity(x, y, item)
-                
-                entities.append(item)
+            self.set_entity(x, y, entity)
+            entities.append(entity)
+    
+    def next_floor(self, player, entities, constants, message_log):
+        return self.change_floor(self.dungeon_level + 1, player, entities, constants, message_log)
     
-    def next_floor(self, player, constants, message_log):
-        self.dungeon_level += 1
-        entities = [player]
+    def change_floor(self, floor, player, entities, constants, message_log):
+        # The floor the player leaves is kept in the dungeon store, and paged back in when the player returns to it
+        previous_level = self.dungeon_level
+        
+        # Only the effects on the player follow it to the other floor
+        self.status_effects.end_effects(player)
+        
+        if self.dungeon_store:
+            self.dungeon_store.store_floor(self, [entity for entity in entities if entity is not player])
         
-        self.tiles = self.initialize_tiles()
-        self.make_map(constants['room_min_size'], constants['room_max_size'], constants['max_rooms'],
-                      constants['map_width'], constants['map_height'], player, entities)
+        self.dungeon_level = floor
+        
+        if self.dungeon_store and self.dungeon_store.has_floor(floor):
+            entities = [player] + self.dungeon_store.load_floor(self)
+            
+            # The player arrives on the stairs leading back to the floor they came from
+            for entity in entities:
+                if entity.stairs and entity.stairs.floor == previous_level:
+                    player.x, player.y = entity.x, entity.y
+                    break
+            
+            self.set_entity(player.x, player.y, player)
+            
+            message_log.add_message(Message('You return to level {0}.'.format(floor), libtcod.light_violet))
+            
+            return entities
+        
+        floor_map, entities = self.take_pregenerated_floor(floor, constants)
+        self.use_tiles_of(floor_map)
+        
+        player.x, player.y = floor_map.player_start
+        self.set_entity(player.x, player.y, player)
+        entities.insert(0, player)
         
         player.fighter.heal(player.fighter.max_hp // 2)
         
         message_log.add_message(Message('You take a moment to rest, and recover your strength.', libtcod.light_violet))
         
-        return entities
\ No newline at end of file
+        return entities
+    
+    def floor_rng(self, floor):
+        # Each floor is generated from its own seed, so it is the same whenever and on whichever thread it is generated
+        if self.seed is None:
+            return Random()
+        
+        return Random('{0}:{1}'.format(self.seed, floor))
+    
+    def generate_floor(self, floor, constants):
+        """
+        Builds a new floor on a separate map, without the player. Returns the map and the entities of the floor.
+        Only reads the settings of this map, so it can run on the floor generator thread.
+        """
+        floor_map = GameMap(self.width, self.height, floor, self.flow_field_ai, self.seed, self.dungeon_store, self.use_fighter_store)
+        floor_map.rng = self.floor_rng(floor)
+        entities = []
+        
+        floor_map.make_map(constants['room_min_size'], constants['room_max_size'], constants['max_rooms'],
+                           constants['map_width'], constants['map_height'], None, entities, constants['map_generator'])
+        
+        return floor_map, entities
+    
+    def pregenerate_floor(self, floor, constants):
+        # Start generating a floor the player hasn't visited yet, change_floor will pick it up
+        if self.pregenerated_floor == floor or (self.dungeon_store and self.dungeon_store.has_floor(floor)):
+            return
+        
+        self.pregenerated = floor_generator.submit(self.generate_floor, floor, constants)
+        self.pregenerated_floor = floor
+    
+    def take_pregenerated_floor(self, floor, constants):
+        # Waits for the floor if it is still being generated, or generates it now if it wasn't asked for
+        if self.pregenerated_floor == floor:
+            floor_map, entities = self.pregenerated.result()
+        else:
+            floor_map, entities = self.generate_floor(floor, constants)
+        
+        self.pregenerated = None
+        self.pregenerated_floor = None
+        
+        return floor_map, entities
+    
+    def use_tiles_of(self, floor_map):
+        # Swap in the tiles and entities of a generated floor, the FOV map comes with them
+        self.fov_map = floor_map.fov_map
+        self.explored = floor_map.explored
+        self.blockers = floor_map.blockers
+        self.cost = floor_map.cost
+        self.entity_index = floor_map.entity_index
+        self.fighter_store = floor_map.fighter_store
+        self.actors = floor_map.actors
+        self.dirty_tiles = floor_map.dirty_tiles
+        self.clear_flow_field()
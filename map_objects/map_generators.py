@@ -0,0 +1,346 @@
+import numpy as np
+import tcod as libtcod
+
+from map_objects.rectangle import Rect
+
+# Map generators carve the tiles of a floor into a GameMap, and return the regions (Rects) of the floor.
+# The player starts at the center of the first region, the stairs down are at the center of the last one,
+# and place_entities spawns monsters and items in every region.
+
+
+def generate_rooms(game_map, room_min_size, room_max_size, max_rooms):
+    # Random rectangular rooms, each one connected to the previous one by an L-shaped tunnel
+    map_width, map_height = game_map.width, game_map.height
+    random = np.random.default_rng(game_map.rng.getrandbits(64))
+    
+    # Every room attempt at once: its size and top left corner
+    w = random.integers(room_min_size, room_max_size, size=max_rooms, endpoint=True)
+    h = random.integers(room_min_size, room_max_size, size=max_rooms, endpoint=True)
+    x = random.integers(0, map_width - w - 1, endpoint=True)
+    y = random.integers(0, map_height - h - 1, endpoint=True)
+    
+    # The rooms that don't overlap a room of an earlier attempt
+    kept = first_fit(x, y, x + w, y + h)
+    x1, y1, x2, y2 = x[kept], y[kept], x[kept] + w[kept], y[kept] + h[kept]
+    
+    # Each tunnel joins the centers of two rooms in a row, horizontally then vertically or the other way around
+    center_x = (x1 + x2) // 2
+    center_y = (y1 + y2) // 2
+    start_x, start_y, end_x, end_y = center_x[:-1], center_y[:-1], center_x[1:], center_y[1:]
+    horizontal_first = random.integers(2, size=len(start_x)).astype(np.bool_)
+    corner_x = np.where(horizontal_first, end_x, start_x)
+    corner_y = np.where(horizontal_first, start_y, end_y)
+    
+    # The inside of the rooms, then the horizontal and the vertical parts of the tunnels
+    floor = fill_rectangles((map_width, map_height),
+                            np.concatenate([x1 + 1, np.minimum(start_x, end_x), corner_x]),
+                            np.concatenate([y1 + 1, corner_y, np.minimum(start_y, end_y)]),
+                            np.concatenate([x2 - 1, np.maximum(start_x, end_x), corner_x]),
+                            np.concatenate([y2 - 1, corner_y, np.maximum(start_y, end_y)]))
+    game_map.carve_mask(floor)
+    
+    return [Rect(room_x, room_y, room_w, room_h) for room_x, room_y, room_w, room_h in
+            zip(x1.tolist(), y1.tolist(), w[kept].tolist(), h[kept].tolist())]
+
+
+def generate_bsp(game_map, room_min_size, room_max_size, max_rooms):
+    # Binary space partition: the map is split in two until the parts are small, with one room per part.
+    # There are at most max_rooms parts, shared between the two halves of each split by their sizes
+    rooms = []
+    split_area(game_map, Rect(0, 0, game_map.width - 1, game_map.height - 1), room_min_size, room_max_size, max_rooms, rooms)
+    
+    return rooms
+
+
+def split_area(game_map, area, room_min_size, room_max_size, max_rooms, rooms):
+    # Adds the rooms of the area (at most max_rooms) to rooms, connected together, and returns the room the area connects through
+    width = area.x2 - area.x1
+    height = area.y2 - area.y1
+    
+    can_split_x = width >= 2 * (room_min_size + 1)
+    can_split_y = height >= 2 * (room_min_size + 1)
+    
+    if max_rooms >= 2 and (can_split_x or can_split_y) and max(width, height) > room_max_size + 1:
+        # Split across the longest side
+        if can_split_x and (width >= height or not can_split_y):
+            split = game_map.rng.randint(area.x1 + room_min_size + 1, area.x2 - room_min_size - 1)
+            first, second = Rect(area.x1, area.y1, split - area.x1, height), Rect(split, area.y1, area.x2 - split, height)
+        else:
+            split = game_map.rng.randint(area.y1 + room_min_size + 1, area.y2 - room_min_size - 1)
+            first, second = Rect(area.x1, area.y1, width, split - area.y1), Rect(area.x1, split, width, area.y2 - split)
+        
+        first_size = (first.x2 - first.x1) * (first.y2 - first.y1)
+        first_rooms = min(max(round(max_rooms * first_size / (width * height)), 1), max_rooms - 1)
+        
+        first_room = split_area(game_map, first, room_min_size, room_max_size, first_rooms, rooms)
+        second_room = split_area(game_map, second, room_min_size, room_max_size, max_rooms - first_rooms, rooms)
+        connect_rooms(game_map, first_room, second_room)
+        
+        return second_room
+    
+    # A leaf: a random room inside the area
+    w = game_map.rng.randint(room_min_size, min(room_max_size, width))
+    h = game_map.rng.randint(room_min_size, min(room_max_size, height))
+    x = game_map.rng.randint(area.x1, area.x2 - w)
+    y = game_map.rng.randint(area.y1, area.y2 - h)
+    room = Rect(x, y, w, h)
+    
+    game_map.create_room(room)
+    rooms.append(room)
+    
+    return room
+
+
+def generate_caves(game_map, room_min_size, room_max_size, max_rooms, wall_chance=0.45, iterations=4):
+    # Cellular automata: random noise smoothed by the number of walls around each tile
+    map_width, map_height = game_map.width, game_map.height
+    random = np.random.default_rng(game_map.rng.getrandbits(64))
+    
+    walls = random.random((map_width, map_height)) < wall_chance
+    
+    for _ in range(iterations):
+        # A tile becomes a wall when most of its 3x3 neighbourhood is made of walls (the border counts as walls)
+        padded = np.pad(walls, 1, constant_values=True).astype(np.int8)
+        neighbours = sum(padded[dx:dx + map_width, dy:dy + map_height] for dx in range(3) for dy in range(3))
+        walls = neighbours >= 5
+    
+    # The border of the map is always made of walls
+    floor = ~walls
+    floor[[0, -1], :] = False
+    floor[:, [0, -1]] = False
+    
+    floor = largest_area(floor)
+    
+    # Too small a map may be left without any floor, the player needs at least a tile
+    if not floor.any():
+        floor[map_width // 2, map_height // 2] = True
+    
+    game_map.carve_mask(floor)
+    
+    return find_regions(game_map, room_min_size, room_max_size, max_rooms)
+
+
+def generate_drunkard_walk(game_map, room_min_size, room_max_size, max_rooms, floor_fraction=0.4, steps=1000):
+    # Walkers stumble around from a tile the previous walker dug, until enough of the map is dug
+    map_width, map_height = game_map.width, game_map.height
+    random = np.random.default_rng(game_map.rng.getrandbits(64))
+    directions = np.array([(1, 0), (-1, 0), (0, 1), (0, -1)])
+    
+    floor = np.zeros((map_width, map_height), dtype=np.bool_, order='F')
+    path = np.array([(map_width // 2, map_height // 2)])
+    
+    # Number of tiles dug so far, counted from each walk rather than summed over the whole map
+    dug = 0
+    
+    while dug < floor_fraction * map_width * map_height:
+        start = path[random.integers(len(path))]
+        
+        # The whole walk at once: a running sum of random steps, kept inside the border
+        path = start + np.cumsum(directions[random.integers(4, size=steps)], axis=0)
+        path[:, 0] = path[:, 0].clip(1, map_width - 2)
+        path[:, 1] = path[:, 1].clip(1, map_height - 2)
+        
+        # A walk crosses its own path, its new tiles are counted once
+        fresh = ~floor[path[:, 0], path[:, 1]]
+        dug += len(np.unique(path[fresh, 0] * map_height + path[fresh, 1]))
+        floor[path[:, 0], path[:, 1]] = True
+    
+    game_map.carve_mask(floor)
+    
+    return find_regions(game_map, room_min_size, room_max_size, max_rooms)
+
+
+def connect_rooms(game_map, room, other_room):
+    # Connect the centers of the rooms with an L-shaped tunnel
+    (prev_x, prev_y) = room.center()
+    (new_x, new_y) = other_room.center()
+    
+    # flip a coin (random number that is either 0 or 1)
+    if game_map.rng.randint(0, 1) == 1:
+        # first move horizontally, then vertically
+        game_map.create_h_tunnel(prev_x, new_x, prev_y)
+        game_map.create_v_tunnel(prev_y, new_y, new_x)
+    else:
+        # first move vertically, then horizontally
+        game_map.create_v_tunnel(prev_y, new_y, prev_x)
+        game_map.create_h_tunnel(prev_x, new_x, new_y)
+
+
+def first_fit(x1, y1, x2, y2):
+    """
+    Indices of the rectangles kept when they are taken in order, each one being dropped if it overlaps
+    (shares a tile with, like Rect.intersect) a rectangle kept before it. Arrays of corners, bounds included.
+    
+    Instead of testing the rectangles one at a time, all the overlapping pairs are found at once, then every
+    rectangle whose earlier neighbours are all dropped is kept and every neighbour after a kept one dropped,
+    until all of them are decided.
+    """
+    count = len(x1)
+    
+    # Pairs of rectangles close enough along x to overlap: neighbours in the order of x1, at most span apart
+    order = np.argsort(x1, kind='stable')
+    sorted_x1 = x1[order]
+    span = (np.searchsorted(sorted_x1, sorted_x1 + (x2 - x1).max(initial=0), side='right') - np.arange(count)).max(initial=1)
+    
+    firsts = [np.empty(0, dtype=np.intp)]
+    seconds = [np.empty(0, dtype=np.intp)]
+    
+    for offset in range(1, span):
+        first, second = order[:-offset], order[offset:]
+        overlap = (x1[first] <= x2[second]) & (x2[first] >= x1[second]) & (y1[first] <= y2[second]) & (y2[first] >= y1[second])
+        firsts.append(first[overlap])
+        seconds.append(second[overlap])
+    
+    first, second = np.concatenate(firsts), np.concatenate(seconds)
+    earlier, later = np.minimum(first, second), np.maximum(first, second)
+    
+    # 0: undecided, 1: kept, 2: dropped. The first undecided rectangle is always decided in a round
+    state = np.zeros(count, dtype=np.int8)
+    
+    while (state == 0).any():
+        state[later[(state[earlier] == 1) & (state[later] == 0)]] = 2
+        
+        blocked = np.bincount(later[state[earlier] != 2], minlength=count)
+        state[(state == 0) & (blocked == 0)] = 1
+    
+    return np.flatnonzero(state == 1)
+
+
+def fill_rectangles(shape, x1, y1, x2, y2):
+    """
+    Mask of the tiles covered by the rectangles with corners (x1, y1) and (x2, y2), bounds included, for arrays of rectangles.
+    Each rectangle adds +1 and -1 marks at its corners, the running sums of the marks count the rectangles over each tile.
+    """
+    height = shape[1] + 1
+    size = (shape[0] + 1) * height
+    
+    plus = np.bincount(np.concatenate([x1 * height + y1, (x2 + 1) * height + y2 + 1]), minlength=size)
+    minus = np.bincount(np.concatenate([(x2 + 1) * height + y1, x1 * height + y2 + 1]), minlength=size)
+    marks = (plus - minus).astype(np.int16).reshape(shape[0] + 1, height)
+    
+    # The sums are kept in int16, numpy would widen them to int64 otherwise
+    return marks.cumsum(axis=0, dtype=np.int16).cumsum(axis=1, dtype=np.int16)[:-1, :-1] > 0
+
+
+def largest_area(floor):
+    # Keep the largest connected part of the floor, so every tile of the floor can be reached
+    if not floor.any():
+        return floor.copy()
+    
+    labels = label_areas(floor)
+    
+    # Ties go to the area with the first tile, the smallest label
+    sizes = np.bincount(labels[floor])
+    
+    return floor & (labels == sizes.argmax())
+
+
+def label_areas(floor):
+    """
+    Labels the connected parts of the floor (tiles touching by a side or a corner) with array operations only:
+    each floor tile gets the smallest flat index of its area, walls get -1.
+    
+    The tiles of each vertical run of floor start with the label of the top of the run. Then each round, the larger
+    label of every pair of touching runs is pointed at the smaller one and the labels are followed to their end,
+    until touching runs all agree.
+    """
+    width, height = floor.shape
+    index = np.arange(width * height).reshape(width, height)
+    
+    # Label of the top of the run, carried down the run by a running maximum
+    tops = floor.copy()
+    tops[:, 1:] &= ~floor[:, :-1]
+    labels = np.maximum.accumulate(np.where(tops, index, 0), axis=1).ravel()
+    
+    # Pairs of runs touching on the next column, by a side or a corner. Runs touch over many tiles, each pair is kept once
+    pairs = []
+    
+    for first, second in ((np.s_[:-1, :], np.s_[1:, :]), (np.s_[:-1, :-1], np.s_[1:, 1:]), (np.s_[:-1, 1:], np.s_[1:, :-1])):
+        both = floor[first] & floor[second]
+        pair = labels[index[first][both]] * (width * height) + labels[index[second][both]]
+        
+        # Tiles in a row along a run mostly give the same pair, drop the repeats before sorting
+        pairs.append(pair[np.diff(pair, prepend=-1) != 0])
+    
+    pairs = np.unique(np.concatenate(pairs))
+    first, second = pairs // (width * height), pairs % (width * height)
+    runs = np.flatnonzero(tops)
+    
+    while True:
+        low = np.minimum(labels[first], labels[second])
+        high = np.maximum(labels[first], labels[second])
+        differ = low != high
+        
+        if not differ.any():
+            break
+        
+        first, second = first[differ], second[differ]
+        np.minimum.at(labels, high[differ], low[differ])
+        
+        # Follow the labels of the runs until each one points at a label pointing at itself
+        while True:
+            followed = labels[labels[runs]]
+            
+            if np.array_equal(followed, labels[runs]):
+                break
+            
+            labels[runs] = followed
+    
+    return np.where(floor, labels[labels].reshape(width, height), -1)
+
+
+def find_regions(game_map, room_min_size, room_max_size, max_rooms):
+    """
+    Regions for the floors without rooms: squares centered on floor tiles, that don't overlap.
+    The last region is the one farthest away from the first, so the stairs are far from the player.
+    """
+    random = np.random.default_rng(game_map.rng.getrandbits(64))
+    
+    # Smaller squares are tried when none of the usual size fits on the floor (small maps, sparse caves)
+    for radius in range(max(room_max_size // 2, 1), 0, -1):
+        regions = square_regions(game_map.walkable, radius, max_rooms, random)
+        
+        if regions:
+            break
+    else:
+        raise ValueError('The floor has no walkable tile away from the border of the map')
+    
+    # Put the region farthest from the start last
+    distance = libtcod.path.maxarray(game_map.walkable.shape, order='F')
+    distance[regions[0].center()] = 0
+    libtcod.path.dijkstra2d(distance, game_map.walkable, 1, 1, out=distance)
+    
+    farthest = max(range(len(regions)), key=lambda index: distance[regions[index].center()])
+    regions.append(regions.pop(farthest))
+    
+    return regions
+
+
+def square_regions(walkable, radius, max_rooms, random):
+    # Squares of the given radius centered on random floor tiles, that don't overlap
+    width, height = walkable.shape
+    
+    # Candidate centers, far enough from the border for the whole square to be inside the map
+    candidates = np.argwhere(walkable[radius:width - radius - 1, radius:height - radius - 1]) + radius
+    candidates = candidates[random.permutation(len(candidates))]
+    
+    # A random candidate per cell of a coarse grid of squares, the squares of two cells can still overlap
+    size = 2 * radius + 1
+    cells = (candidates[:, 0] // size) * (height // size + 1) + candidates[:, 1] // size
+    _, first = np.unique(cells, return_index=True)
+    centers = candidates[np.sort(first)]
+    
+    # Taken in the shuffled order, each square is dropped if it overlaps one kept before it
+    x, y = centers[:, 0], centers[:, 1]
+    kept = first_fit(x - radius, y - radius, x + radius, y + radius)[:max_rooms]
+    
+    return [Rect(x - radius, y - radius, 2 * radius, 2 * radius) for x, y in centers[kept].tolist()]
+
+
+# Generators selectable with the 'map_generator' constant
+map_generators = {
+    'rooms': generate_rooms,
+    'bsp': generate_bsp,
+    'caves': generate_caves,
+    'drunkard_walk': generate_drunkard_walk,
+}
@@ -10,6 +10,14 @@ class Rect:
         center_y = int((self.y1 + self.y2) / 2)
         return (center_x, center_y)
     
+    def slices(self):
+        # Index of the whole rectangle (walls included) in a [x, y] array
+        return slice(self.x1, self.x2 + 1), slice(self.y1, self.y2 + 1)
+    
+    def inner_slices(self):
+        # Index of the floor of the room, inside the walls
+        return slice(self.x1 + 1, self.x2), slice(self.y1 + 1, self.y2)
+    
     def intersect(self, other):
         # returns true if this rectangle intersects with another one
         return (self.x1 <= other.x2 and self.x2 >= other.x1 and
@@ -0,0 +1,111 @@
+import math
+
+
+class SpatialIndex:
+    """
+    A uniform grid of buckets holding the entities of a map, used for position, area and nearest lookups
+    without scanning every entity.
+    """
+    def __init__(self, width, height, bucket_size=8):
+        self.width = width
+        self.height = height
+        self.bucket_size = bucket_size
+        
+        # Entities per occupied tile and per occupied bucket
+        self.cells = {}
+        self.buckets = {}
+        
+    def add(self, entity, x, y):
+        # Entities of a tile are kept sorted by render order, the one drawn on top is the last
+        entities_in_tile = self.cells.setdefault((x, y), [])
+        index = len(entities_in_tile)
+        while index > 0 and entities_in_tile[index - 1].render_order.value > entity.render_order.value:
+            index -= 1
+        entities_in_tile.insert(index, entity)
+        
+        self.buckets.setdefault((x // self.bucket_size, y // self.bucket_size), []).append(entity)
+        
+    def remove(self, entity, x, y):
+        self._discard(self.cells, (x, y), entity)
+        self._discard(self.buckets, (x // self.bucket_size, y // self.bucket_size), entity)
+        
+    def at(self, x, y):
+        return self.cells.get((x, y), [])
+    
+    def in_rect(self, x1, y1, x2, y2):
+        # All the entities inside the rectangle, bounds included
+        results = []
+        
+        for bx in range(x1 // self.bucket_size, x2 // self.bucket_size + 1):
+            for by in range(y1 // self.bucket_size, y2 // self.bucket_size + 1):
+                for entity in self.buckets.get((bx, by), ()):
+                    if x1 <= entity.x <= x2 and y1 <= entity.y <= y2:
+                        results.append(entity)
+        
+        return results
+    
+    def in_radius(self, x, y, radius):
+        # All the entities at a distance of at most radius from (x, y)
+        radius_floor = int(radius)
+        
+        return [entity for entity in self.in_rect(x - radius_floor, y - radius_floor, x + radius_floor, y + radius_floor)
+                if entity.distance(x, y) <= radius]
+    
+    def nearest(self, x, y, max_distance=None, predicate=None):
+        # The closest entity (accepted by predicate) to (x, y), searching buckets in rings around the point
+        # Returns (None, None) if there is no such entity closer than max_distance
+        if not self.buckets:
+            return None, None
+        
+        center_x = x // self.bucket_size
+        center_y = y // self.bucket_size
+        
+        # Rings beyond this one are outside of the map
+        last_bucket_x = (self.width - 1) // self.bucket_size
+        last_bucket_y = (self.height - 1) // self.bucket_size
+        last_ring = max(center_x, last_bucket_x - center_x, center_y, last_bucket_y - center_y)
+        
+        best = None
+        best_distance = math.inf
+        
+        for ring in range(last_ring + 1):
+            # Every entity in this ring (or beyond) is farther than this from the point
+            ring_distance = (ring - 1) * self.bucket_size
+            if best_distance <= ring_distance or (max_distance is not None and ring_distance >= max_distance):
+                break
+            
+            for bx, by in self._ring(center_x, center_y, ring):
+                for entity in self.buckets.get((bx, by), ()):
+                    distance = entity.distance(x, y)
+                    
+                    if distance < best_distance and (max_distance is None or distance < max_distance) and (
+                            predicate is None or predicate(entity)):
+                        best = entity
+                        best_distance = distance
+        
+        if best is None:
+            return None, None
+        
+        return best, best_distance
+    
+    @staticmethod
+    def _ring(center_x, center_y, ring):
+        if ring == 0:
+            yield center_x, center_y
+            return
+        
+        for bx in range(center_x - ring, center_x + ring + 1):
+            yield bx, center_y - ring
+            yield bx, center_y + ring
+        
+        for by in range(center_y - ring + 1, center_y + ring):
+            yield center_x - ring, by
+            yield center_x + ring, by
+    
+    @staticmethod
+    def _discard(table, key, entity):
+        entities = table[key]
+        entities.remove(entity)
+        
+        if not entities:
+            del table[key]
@@ -1,15 +1,72 @@
 class Tile:
     """
-    A tile on a map. It may or may not be blocked, and may or may not block sight.
+    A view of a single tile on a GameMap. It may or may not be blocked, and may or may not block sight.
+    The data itself lives in the GameMap arrays, this only forwards reads and writes to them.
     """
-    def __init__(self, blocked, block_sight=None):
-        self.blocked = blocked
+    __slots__ = ('game_map', 'x', 'y')
+    
+    def __init__(self, game_map, x, y):
+        self.game_map = game_map
+        self.x = x
+        self.y = y
         
-        # By default, if a tile is blocked, it also blocks sight
-        if block_sight is None:
-            block_sight = blocked
+    @property
+    def blocked(self):
+        return not self.game_map.walkable[self.x, self.y]
+    
+    @blocked.setter
+    def blocked(self, value):
+        game_map = self.game_map
+        game_map.walkable[self.x, self.y] = not value
         
-        self.block_sight = block_sight
-        self.explored = False
-        self.entities = []
-    
\ No newline at end of file
+        # Keep the pathfinding grid in step: a wall or a tile with a fighter costs 0
+        game_map.cost[self.x, self.y] = not value and game_map.blockers[self.x, self.y] == 0
+        game_map.clear_flow_field()
+        
+    @property
+    def block_sight(self):
+        return not self.game_map.transparent[self.x, self.y]
+    
+    @block_sight.setter
+    def block_sight(self, value):
+        self.game_map.transparent[self.x, self.y] = not value
+        
+    @property
+    def explored(self):
+        return bool(self.game_map.explored[self.x, self.y])
+    
+    @explored.setter
+    def explored(self, value):
+        self.game_map.explored[self.x, self.y] = value
+        
+    @property
+    def entities(self):
+        # Read-only: entities are added and removed with GameMap.set_entity and remove_entity
+        return tuple(self.game_map.get_entities(self.x, self.y))
+
+
+class TileGrid:
+    """
+    Allows the old game_map.tiles[x][y] access on top of the GameMap arrays.
+    """
+    def __init__(self, game_map):
+        self.game_map = game_map
+        
+    def __getitem__(self, x):
+        return TileColumn(self.game_map, x)
+    
+    def __len__(self):
+        return self.game_map.width
+
+
+class TileColumn:
+    
+    def __init__(self, game_map, x):
+        self.game_map = game_map
+        self.x = x
+        
+    def __getitem__(self, y):
+        return Tile(self.game_map, self.x, y)
+    
+    def __len__(self):
+        return self.game_map.height
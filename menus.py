@@ -35,10 +35,10 @@ def inventory_menu(con, header, player, inventory_width, screen_width, screen_he
         options = []
         
         for item in player.inventory.items:
-            if player.equipement.main_hand == item:
-                options.append('{0} (on main hand)'.format(item.name))
-            elif player.equipement.off_hand == item:
-                options.append('{0} (on off hand)'.format(item.name))
+            slot = player.equipement.slot_of(item)
+            
+            if slot:
+                options.append('{0} (on {1})'.format(item.name, slot.name.lower().replace('_', ' ')))
             else:
                 options.append(item.name)
         
@@ -1,24 +1,11 @@
-from random import randint
+import numpy as np
 
-def random_choice_index(chances):
-    
-    random_chance = randint(0, sum(chances))
-    running_sum = 0
-    choice = 0
-    
-    for weight in chances:
-        running_sum += weight
-        
-        if random_chance <= running_sum:
-            return choice
-        
-        choice += 1
-
-def random_choice_from_dict(choice_dict):
+def random_choices_from_dict(choice_dict, size, generator):
+    # size choices drawn at once with a NumPy generator
     choices = list(choice_dict.keys())
-    chances = list(choice_dict.values())
+    chances = np.array(list(choice_dict.values()), dtype=np.float64)
     
-    return choices[random_choice_index(chances)]
+    return [choices[index] for index in generator.choice(len(choices), size=size, p=chances / chances.sum())]
 
 def from_dungeon_level(table, dungeon_level):
     for (value, level) in reversed(table):
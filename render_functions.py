@@ -1,8 +1,10 @@
+import numpy as np
 import tcod as libtcod
 from enum import Enum
 
 from game_states import GameStates
 from menus import inventory_menu, level_up_menu, character_screen
+from map_objects.fov_functions import is_in_fov, in_fov
 
 INVENTORY_WIDTH = 50
 
@@ -11,11 +13,23 @@ class RenderOrder(Enum):
     CORPSE = 2
     ITEM = 3
     ACTOR = 4
+    
+class RenderState:
+    """
+    Remembers what is drawn on the map console, so that render_all only redraws the tiles that changed.
+    """
+    def __init__(self):
+        self.reset()
+        
+    def reset(self):
+        # FOV the console was drawn with, None means the whole map must be redrawn
+        self.visible = None
 
 def get_names_on_mouse_hover(mouse, game_map, fov_map):
     (x, y) = (mouse.cx, mouse.cy)
     
-    if libtcod.map_is_in_fov(fov_map, x, y):
+    # The mouse can be anywhere on the screen, is_in_fov is false out of the map
+    if is_in_fov(fov_map, x, y):
         entities_in_tile = game_map.get_entities(x, y)
         for entity in entities_in_tile:
             name = entity.name
@@ -37,33 +51,44 @@ def render_bar(panel, x, y, total_width, name, value, maximum, bar_color, back_c
     libtcod.console_print_ex(panel, int(x + total_width / 2), y, libtcod.BKGND_NONE, libtcod.CENTER,
                              '{0}: {1}/{2}'.format(name, value, maximum))
     
-def render_all(con, panel, entities, player, screen_width, screen_height, game_map, fov_map, fov_recompute,
+def render_all(con, panel, render_state, player, screen_width, screen_height, game_map, fov_map, fov_recompute,
                message_log, bar_width, panel_height, panel_y, mouse, colors, game_state):
-    # Draw all tiles
-    if fov_recompute:
-        for y in range(game_map.height):
-            for x in range(game_map.width):
-                wall = game_map.tiles[x][y].block_sight
-                visible = libtcod.map_is_in_fov(fov_map, x, y)
-                explored = game_map.tiles[x][y].explored
-                
-                if visible:
-                    game_map.tiles[x][y].explored = True
-                    
-                    if wall:
-                        libtcod.console_set_char_background(con, x, y, colors.get('light_wall'), libtcod.BKGND_SET)
-                    else:
-                        libtcod.console_set_char_background(con, x, y, colors.get('light_ground'), libtcod.BKGND_SET)
-                elif explored:
-                    if wall:
-                        libtcod.console_set_char_background(con, x, y, colors.get('dark_wall'), libtcod.BKGND_SET)
-                    else:
-                        libtcod.console_set_char_background(con, x, y, colors.get('dark_ground'), libtcod.BKGND_SET)
+    full_redraw = render_state.visible is None
+    
+    # Draw the tiles whose visibility changed
+    if fov_recompute or full_redraw:
+        visible = fov_map.fov.copy()
+        
+        if full_redraw:
+            changed = visible | game_map.explored
+        else:
+            changed = visible != render_state.visible
+        
+        # Background colors indexed with visible * 2 + wall
+        tile_colors = np.array([colors.get('dark_ground'), colors.get('dark_wall'),
+                                colors.get('light_ground'), colors.get('light_wall')], dtype=np.uint8)
+        
+        # The console is indexed with [y, x], transpose it to match the map
+        bg = con.bg.transpose(1, 0, 2)[:game_map.width, :game_map.height]
+        bg[changed] = tile_colors[visible[changed] * 2 + ~game_map.transparent[changed]]
+        
+        # The entities of these tiles may have appeared or disappeared
+        game_map.dirty_tiles.update(position for position in game_map.entity_index.cells if changed[position])
+        
+        render_state.visible = visible
+    
+    if full_redraw:
+        game_map.dirty_tiles.update(game_map.entity_index.cells)
                     
-    # Draw all entities
-    entities_in_render_order = sorted(entities, key=lambda x: x.render_order.value)
-    for entity in entities_in_render_order:
-        draw_entity(con, fov_map, entity, game_map)
+    # Draw the entities of the tiles that changed, with the visibility of all these tiles looked up at once
+    if game_map.dirty_tiles:
+        dirty_tiles = list(game_map.dirty_tiles)
+        xs, ys = zip(*dirty_tiles)
+        
+        for (x, y), visible in zip(dirty_tiles, in_fov(fov_map, xs, ys).tolist()):
+            draw_entities_in_tile(con, visible, game_map, x, y)
+        
+        game_map.dirty_tiles.clear()
         
     libtcod.console_blit(con, 0, 0, screen_width, screen_height, 0, 0, 0)    
     
@@ -113,15 +138,19 @@ def render_all(con, panel, entities, player, screen_width, screen_height, game_m
     elif game_state == GameStates.CHARACTER_SCREEN:
         character_screen(player, 30, 10, screen_width, screen_height)
     
-def clear_all(con, entities):
-    # Clear all entities
-    for entity in entities:
-        clear_entity(con, entity)
+def draw_entities_in_tile(con, visible, game_map, x, y):
+    # Entities of a tile are sorted by render order, so the first one that can be seen from the end is on top
+    for entity in reversed(game_map.get_entities(x, y)):
+        if draw_entity(con, visible, entity, game_map):
+            return
+    
+    libtcod.console_put_char(con, x, y, ' ', libtcod.BKGND_NONE)
     
-def draw_entity(con, fov_map, entity, game_map):
-    if libtcod.map_is_in_fov(fov_map, entity.x, entity.y) or (entity.stairs and game_map.tiles[entity.x][entity.y].explored):
+def draw_entity(con, visible, entity, game_map):
+    # visible tells if the tile of the entity is in the FOV
+    if visible or (entity.stairs and game_map.explored[entity.x, entity.y]):
         libtcod.console_set_default_foreground(con, entity.color)
         libtcod.console_put_char(con, entity.x, entity.y, entity.char, libtcod.BKGND_NONE)
-        
-def clear_entity(con, entity):
-    libtcod.console_put_char(con, entity.x, entity.y, ' ', libtcod.BKGND_NONE)
\ No newline at end of file
+        return True
+    
+    return False
@@ -0,0 +1,168 @@
+import argparse
+import time
+
+import tcod as libtcod
+
+from loader_functions.initialize_new_game import get_constants, get_game_variables
+from game_session import GameSession
+from game_states import GameStates
+
+
+class ScriptedInput:
+    """
+    Plays a fixed list of actions (the same dicts handle_keys returns), then exits the game.
+    Actions can also be (action, mouse_action) tuples for targeting.
+    """
+    def __init__(self, actions):
+        self.actions = iter(actions)
+    
+    def get_action(self, session):
+        action = next(self.actions, {'exit': True})
+        
+        if isinstance(action, tuple):
+            return action
+        
+        return action, {}
+
+
+class BotInput:
+    """
+    A simple bot: heals when low, fights what is next to it, picks up what it walks on,
+    and otherwise walks down to the stairs.
+    """
+    DIRECTIONS = ((-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1))
+    
+    def __init__(self, heal_threshold=0.4):
+        self.heal_threshold = heal_threshold
+        self.stairs_distance = None
+        self.stairs_level = None
+    
+    def get_action(self, session):
+        player = session.player
+        game_map = session.game_map
+        
+        if session.game_state == GameStates.LEVEL_UP:
+            return {'level_up_stat': 'hp'}, {}
+        
+        if session.game_state == GameStates.TARGETING:
+            # The bot only reads scrolls that don't need a target
+            return {'exit': True}, {}
+        
+        potion_index = self.find_item(player, 'Healing Potion')
+        
+        if session.game_state == GameStates.SHOW_INVENTORY:
+            if potion_index is None:
+                return {'exit': True}, {}
+            return {'inventory_index': potion_index}, {}
+        
+        if player.fighter.hp < player.fighter.max_hp * self.heal_threshold and potion_index is not None:
+            return {'show_inventory': True}, {}
+        
+        # Attack a monster next to the player
+        for dx, dy in self.DIRECTIONS:
+            if any(entity.ai for entity in game_map.get_entities(player.x + dx, player.y + dy)):
+                return {'move': (dx, dy)}, {}
+        
+        entities_in_tile = game_map.get_entities(player.x, player.y)
+        
+        if any(entity.stairs and entity.stairs.floor > game_map.dungeon_level for entity in entities_in_tile):
+            return {'take_stairs': True}, {}
+        
+        if any(entity.item for entity in entities_in_tile) and len(player.inventory.items) < player.inventory.capacity:
+            return {'pickup': True}, {}
+        
+        return {'move': self.step_to_stairs(session)}, {}
+    
+    def step_to_stairs(self, session):
+        player = session.player
+        game_map = session.game_map
+        
+        # Distance to the stairs of the floor, computed once per floor
+        if self.stairs_level != game_map.dungeon_level or self.stairs_distance is None:
+            self.stairs_distance = libtcod.path.maxarray((game_map.width, game_map.height), order='F')
+            
+            for entity in session.entities:
+                if entity.stairs and entity.stairs.floor > game_map.dungeon_level:
+                    self.stairs_distance[entity.x, entity.y] = 0
+            
+            libtcod.path.dijkstra2d(self.stairs_distance, game_map.walkable, 2, 3, out=self.stairs_distance)
+            self.stairs_level = game_map.dungeon_level
+        
+        best_move = (0, 0)
+        best_distance = self.stairs_distance[player.x, player.y]
+        
+        for dx, dy in self.DIRECTIONS:
+            if self.stairs_distance[player.x + dx, player.y + dy] < best_distance:
+                best_move = (dx, dy)
+                best_distance = self.stairs_distance[player.x + dx, player.y + dy]
+        
+        return best_move
+    
+    @staticmethod
+    def find_item(player, name):
+        for index, item in enumerate(player.inventory.items):
+            if item.name == name:
+                return index
+        
+        return None
+
+
+def run_headless(session, input_source, max_turns=1000):
+    """
+    Runs the turn loop of a session without any window, until the player dies, exits, or max_turns enemy turns were played.
+    Returns the reason the game stopped: 'dead', 'exit' or 'max_turns'.
+    """
+    # Actions that don't take a turn (menus, bumping into walls) can't loop forever
+    max_actions = max_turns * 10
+    
+    for _ in range(max_actions):
+        session.recompute_fov()
+        session.fov_recompute = False
+        
+        action, mouse_action = input_source.get_action(session)
+        events = session.play(action, mouse_action)
+        
+        if session.game_state == GameStates.PLAYER_DEAD:
+            return 'dead'
+        
+        if events.get('exit'):
+            return 'exit'
+        
+        if session.turn >= max_turns:
+            return 'max_turns'
+    
+    return 'max_turns'
+
+
+def new_session(constants, seed=None):
+    # Headless games only go down and may run in parallel, they don't keep the floors they leave
+    constants = dict(constants, dungeon_directory=None)
+    
+    player, entities, game_map, message_log, game_state = get_game_variables(constants, seed)
+    
+    return GameSession(player, entities, game_map, message_log, game_state, constants)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Play games without a window, driven by a bot.')
+    parser.add_argument('--games', type=int, default=1, help='number of games to play')
+    parser.add_argument('--turns', type=int, default=1000, help='maximum number of turns per game')
+    parser.add_argument('--seed', type=int, default=None, help='seed of the first game, the next games use the following seeds')
+    args = parser.parse_args()
+    
+    constants = get_constants()
+    
+    for game in range(args.games):
+        seed = None if args.seed is None else args.seed + game
+        session = new_session(constants, seed)
+        
+        start = time.perf_counter()
+        outcome = run_headless(session, BotInput(), args.turns)
+        elapsed = time.perf_counter() - start
+        
+        print('Game {0} (seed {1}): {2} after {3} turns on dungeon level {4} ({5:.0f} turns/s)'.format(
+            game + 1, session.game_map.seed, outcome, session.turn, session.game_map.dungeon_level, session.turn / max(elapsed, 1e-9)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import json
+import os
+from functools import lru_cache
+
+import tcod as libtcod
+
+import item_functions
+from entity import Entity
+from components.fighter import Fighter
+from components.ai import BasicMonster, FlowFieldMonster
+from components.item import Item
+from components.equippable import Equippable
+from equipement_slots import EquipementSlots
+from render_functions import RenderOrder
+from game_messages import Message
+
+TEMPLATES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources', 'entities.json')
+
+
+class EntityPrototype:
+    """
+    An entity template compiled once. The data every spawned entity shares (name, glyph, colour, item function,
+    targeting message and arguments) is built here, spawn only creates the entity and its components.
+    """
+    def __init__(self, template):
+        self.name = template['name']
+        self.char = template['char']
+        self.color = parse_color(template['color'])
+        self.render_order = RenderOrder[template.get('render_order', 'CORPSE')]
+        self.speed = template.get('speed', 100)
+        
+        # Where and how often it spawns: 'monster' or 'item', with a from_dungeon_level table of chances
+        self.spawn_kind = template.get('spawn')
+        self.chances = template.get('chances', [[0, 1]])
+        
+        self.fighter = template.get('fighter')
+        self.ai = template.get('ai', False)
+        
+        self.item = template.get('item')
+        
+        if self.item:
+            self.use_function = getattr(item_functions, self.item['use_function']) if self.item.get('use_function') else None
+            self.targeting = self.item.get('targeting', False)
+            self.targeting_message = parse_message(self.item.get('targeting_message'))
+            self.function_kwargs = self.item.get('kwargs', {})
+        
+        self.equippable = template.get('equippable')
+        
+        if self.equippable:
+            self.equippable = dict(self.equippable, slot=EquipementSlots[self.equippable['slot']])
+    
+    def spawn(self, x, y, game_map):
+        fighter_component = Fighter(**self.fighter) if self.fighter else None
+        ai_component = None
+        item_component = None
+        equippable_component = Equippable(**self.equippable) if self.equippable else None
+        
+        if self.ai:
+            ai_component = FlowFieldMonster() if game_map.flow_field_ai else BasicMonster()
+        
+        if self.item:
+            item_component = Item(use_function=self.use_function, targeting=self.targeting, targeting_message=self.targeting_message)
+            # The arguments are only read by the item functions, every item of the template shares them
+            item_component.function_kwargs = self.function_kwargs
+        
+        return Entity(x, y, self.name, self.char, self.color, fighter_component, ai_component, item=item_component,
+                      equippable=equippable_component, render_order=self.render_order, speed=self.speed)
+
+
+@lru_cache(maxsize=None)
+def load_prototypes(path=TEMPLATES_FILE):
+    # Templates are read and compiled once, on the first spawn
+    with open(path) as file:
+        templates = json.load(file)
+    
+    prototypes = {key: EntityPrototype(template) for key, template in templates.items()}
+    
+    # The actor scheduler divides by the speed
+    for key, prototype in prototypes.items():
+        if not isinstance(prototype.speed, int) or prototype.speed <= 0:
+            raise ValueError('The speed of {0} in {1} must be a positive integer, not {2!r}'.format(key, path, prototype.speed))
+    
+    return prototypes
+
+
+def parse_color(color):
+    # Either the name of a libtcod colour or [r, g, b]
+    if isinstance(color, str):
+        return getattr(libtcod, color)
+    
+    return libtcod.Color(*color)
+
+
+def parse_message(data):
+    if data is None:
+        return None
+    
+    return Message(data['text'], parse_color(data['color']))
@@ -0,0 +1,165 @@
+import heapq
+import itertools
+
+import tcod as libtcod
+
+from components.ai import ConfusedMonster
+from game_messages import Message
+
+
+class StatusEffect:
+    """
+    A timed effect on an entity. apply runs when it is added, tick every interval turns (if it has an interval)
+    and expire when its duration is over. Each of them returns a list of results, like the other game actions.
+    """
+    interval = None
+    
+    def __init__(self, duration, amount=0):
+        self.duration = duration
+        self.amount = amount
+        self.entity = None
+        self.expires = None
+        self.active = True
+    
+    def apply(self):
+        return []
+    
+    def tick(self):
+        return []
+    
+    def expire(self):
+        return []
+
+
+class Confusion(StatusEffect):
+    
+    def apply(self):
+        # Confusions don't stack, the first one to expire gives the AI back
+        if not isinstance(self.entity.ai, ConfusedMonster):
+            self.entity.ai = ConfusedMonster(self.entity.ai)
+            self.entity.ai.owner = self.entity
+        
+        return []
+    
+    def expire(self):
+        # A confused monster that died has no AI to give back, nor one already given back by another confusion
+        if not isinstance(self.entity.ai, ConfusedMonster):
+            return []
+        
+        self.entity.ai = self.entity.ai.preivous_ai
+        
+        return [{'message': Message('The {0} is no longer confused!'.format(self.entity.name), libtcod.red)}]
+
+
+class Poison(StatusEffect):
+    interval = 1
+    
+    def tick(self):
+        if not self.entity.fighter:
+            return []
+        
+        results = [{'message': Message('The {0} suffers {1} poison damage.'.format(self.entity.name, self.amount), libtcod.dark_green)}]
+        
+        for result in self.entity.fighter.take_damage(self.amount):
+            results.append(dict(result, cause='poison'))
+        
+        return results
+
+
+class Regeneration(StatusEffect):
+    interval = 1
+    
+    def tick(self):
+        if self.entity.fighter and self.entity.fighter.hp > 0:
+            self.entity.fighter.heal(self.amount)
+        
+        return []
+
+
+class Haste(StatusEffect):
+    
+    def apply(self):
+        self.entity.speed *= 2
+        
+        return []
+    
+    def expire(self):
+        # Never down to 0, the actor scheduler divides by the speed
+        self.entity.speed = max(self.entity.speed // 2, 1)
+        
+        return []
+
+
+class StatusEffects:
+    """
+    Schedules the status effects of the game in a heap ordered by the turn of their next event (tick or expiry),
+    so a turn only costs the effects that fire on it.
+    """
+    def __init__(self):
+        self.turn = 0
+        self.queue = []
+        self.counter = itertools.count()
+    
+    def add(self, entity, effect):
+        effect.entity = entity
+        effect.expires = self.turn + effect.duration
+        self.schedule(effect)
+        
+        return effect.apply()
+    
+    def restore(self, entity, effect, expires, next_turn):
+        # Put back a saved effect, already applied to its entity
+        effect.entity = entity
+        effect.expires = expires
+        heapq.heappush(self.queue, (next_turn, next(self.counter), effect))
+    
+    def update(self):
+        # Ends the current turn: runs the ticks and expiries due, returns their results
+        self.turn += 1
+        results = []
+        
+        while self.queue and self.queue[0][0] <= self.turn:
+            _, _, effect = heapq.heappop(self.queue)
+            
+            if not effect.active:
+                continue
+            
+            if self.turn < effect.expires:
+                results.extend(effect.tick())
+                self.schedule(effect)
+                continue
+            
+            # The last tick happens on the turn the effect expires
+            if effect.interval:
+                results.extend(effect.tick())
+            
+            effect.active = False
+            results.extend(effect.expire())
+        
+        return results
+    
+    def end_effects(self, keep):
+        # Ends at once the effects of every entity but keep (the player leaving a floor), without messages
+        for _, _, effect in self.queue:
+            if effect.active and effect.entity is not keep:
+                effect.active = False
+                effect.expire()
+        
+        self.queue = [entry for entry in self.queue if entry[2].active]
+        heapq.heapify(self.queue)
+    
+    def scheduled(self):
+        # (next turn, effect) for every running effect
+        return [(next_turn, effect) for next_turn, _, effect in self.queue if effect.active]
+    
+    def schedule(self, effect):
+        next_turn = effect.expires
+        
+        if effect.interval:
+            next_turn = min(self.turn + effect.interval, effect.expires)
+        
+        heapq.heappush(self.queue, (next_turn, next(self.counter), effect))
+
+
+# Effect classes by name, for the save file
+status_effect_kinds = {kind.__name__: kind for kind in (Confusion, Poison, Regeneration, Haste)}
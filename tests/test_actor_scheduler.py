@@ -0,0 +1,137 @@
+import json
+
+import pytest
+import tcod as libtcod
+
+from components.ai import BasicMonster
+from entity import Entity
+from map_objects.actor_scheduler import ActorScheduler
+from spawn_functions import load_prototypes
+from status_effects import Haste, StatusEffects
+
+
+def make_actor(name, speed, x=0, y=0):
+    return Entity(x, y, name, 'o', libtcod.white, ai=BasicMonster(), speed=speed)
+
+
+def play_turns(scheduler, player, turns, sight_radius=8):
+    return [[entity.name for entity in scheduler.next_turn(player, sight_radius)] for _ in range(turns)]
+
+
+def test_actors_act_by_speed_in_order_of_their_actions():
+    player = make_actor('player', 100)
+    scheduler = ActorScheduler()
+    
+    for name, speed in (('normal', 100), ('fast', 200), ('slow', 50)):
+        scheduler.add(make_actor(name, speed))
+    
+    # Actors due at the same time act in the order they were added
+    assert play_turns(scheduler, player, 4) == [
+        ['fast', 'normal', 'fast'],
+        ['fast', 'normal', 'fast', 'slow'],
+        ['fast', 'normal', 'fast'],
+        ['fast', 'normal', 'fast', 'slow'],
+    ]
+
+
+def test_removed_actors_never_act_again():
+    player = make_actor('player', 100)
+    scheduler = ActorScheduler()
+    orc = make_actor('orc', 100)
+    troll = make_actor('troll', 100)
+    
+    scheduler.add(orc)
+    scheduler.add(troll)
+    scheduler.add(orc)
+    scheduler.remove(orc)
+    
+    assert play_turns(scheduler, player, 2) == [['troll'], ['troll']]
+
+
+def test_far_actors_sleep_until_the_player_comes_close():
+    player = make_actor('player', 100)
+    scheduler = ActorScheduler()
+    scheduler.add(make_actor('far', 100, x=60, y=30))
+    
+    assert play_turns(scheduler, player, 2) == [[], []]
+    
+    player.x, player.y = 55, 28
+    
+    assert play_turns(scheduler, player, 1) == [['far']]
+
+
+def test_unlimited_sight_radius_never_parks_actors():
+    player = make_actor('player', 100)
+    scheduler = ActorScheduler()
+    scheduler.add(make_actor('far', 100, x=200, y=150))
+    
+    assert play_turns(scheduler, player, 2, sight_radius=0) == [['far'], ['far']]
+
+
+def test_actors_parked_before_sight_became_unlimited_wake_up():
+    player = make_actor('player', 100)
+    scheduler = ActorScheduler()
+    scheduler.add(make_actor('far', 100, x=200, y=150))
+    
+    assert play_turns(scheduler, player, 1) == [[]]
+    assert play_turns(scheduler, player, 1, sight_radius=0) == [['far']]
+
+
+def test_haste_never_brings_the_speed_to_zero():
+    entity = make_actor('orc', 1)
+    effects = StatusEffects()
+    
+    effects.add(entity, Haste(2))
+    assert entity.speed == 2
+    
+    entity.speed = 1
+    effects.update()
+    effects.update()
+    
+    assert entity.speed == 1
+
+
+@pytest.mark.parametrize('speed', [0, -100, 'fast'])
+def test_templates_with_a_bad_speed_are_rejected(tmp_path, speed):
+    path = tmp_path / 'entities.json'
+    path.write_text(json.dumps({'orc': {'name': 'Orc', 'char': 'o', 'color': [63, 127, 63], 'speed': speed}}))
+    
+    with pytest.raises(ValueError):
+        load_prototypes(str(path))
+
+
+def play_game(seed, turns):
+    from loader_functions.initialize_new_game import get_constants
+    from simulation import BotInput, new_session, run_headless
+    
+    session = new_session(dict(get_constants(), flow_field_ai=True), seed)
+    outcome = run_headless(session, BotInput(), turns)
+    
+    return outcome, session.turn, session.kills, [(entity.name, entity.x, entity.y) for entity in session.entities]
+
+
+@pytest.mark.parametrize('seed', [3, 7, 9, 11])
+def test_sleeping_actors_change_nothing_in_a_game(seed, monkeypatch):
+    game = play_game(seed, 400)
+    
+    monkeypatch.setattr(BasicMonster, 'dormant_when_far', False)
+    
+    assert play_game(seed, 400) == game
+
+
+def test_woken_actors_keep_their_place_in_the_order():
+    player = make_actor('player', 100)
+    scheduler = ActorScheduler()
+    
+    for name, speed, x in (('near', 100, 0), ('far fast', 200, 40), ('far', 100, 40), ('near slow', 50, 0)):
+        scheduler.add(make_actor(name, speed, x=x))
+    
+    assert play_turns(scheduler, player, 2) == [['near'], ['near', 'near slow']]
+    
+    player.x = 20
+    
+    # As if they never slept: the fast one acts twice, and the ones due at the same time in the order they were added
+    assert play_turns(scheduler, player, 2, sight_radius=30) == [
+        ['far fast', 'near', 'far fast', 'far'],
+        ['far fast', 'near', 'far fast', 'far', 'near slow'],
+    ]
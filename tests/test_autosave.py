@@ -0,0 +1,56 @@
+import os
+import threading
+import time
+
+from loader_functions import autosave
+from loader_functions.autosave import Autosaver
+from loader_functions.data_loaders import write_temp_save
+from loader_functions.initialize_new_game import get_constants
+from simulation import new_session
+
+
+def save(autosaver, session):
+    autosaver.save(session.player, session.entities, session.game_map, session.message_log, session.game_state)
+
+
+def test_autosave_is_written(tmp_path):
+    path = str(tmp_path / 'autosave.npz')
+    autosaver = Autosaver(path)
+    save(autosaver, new_session(get_constants(), 1))
+    
+    # Closing drops the pending snapshot, wait for the worker to have taken it
+    while autosaver.snapshots.qsize():
+        time.sleep(0.001)
+    
+    autosaver.close()
+    
+    assert os.path.isfile(path)
+    assert not os.path.exists(path + '.tmp')
+
+
+def test_late_autosave_is_not_swapped_in_after_close(tmp_path, monkeypatch):
+    path = str(tmp_path / 'autosave.npz')
+    writing = threading.Event()
+    release = threading.Event()
+    
+    def slow_write(data_file, path):
+        writing.set()
+        release.wait()
+        return write_temp_save(data_file, path)
+    
+    monkeypatch.setattr(autosave, 'write_temp_save', slow_write)
+    monkeypatch.setattr(autosave, 'CLOSE_TIMEOUT', 0.01)
+    
+    autosaver = Autosaver(path)
+    save(autosaver, new_session(get_constants(), 1))
+    writing.wait()
+    
+    # close gives up waiting while the snapshot is still being written
+    autosaver.close()
+    assert autosaver.worker.is_alive()
+    
+    release.set()
+    autosaver.worker.join()
+    
+    assert not os.path.exists(path)
+    assert not os.path.exists(path + '.tmp')
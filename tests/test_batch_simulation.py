@@ -0,0 +1,31 @@
+from batch_simulation import aggregate, run_batch, simulate_game
+from loader_functions.initialize_new_game import get_constants
+
+
+def without_timing(result):
+    return {key: value for key, value in result.items() if key != 'time_per_turn'}
+
+
+def test_same_seed_gives_the_same_game():
+    constants = get_constants()
+    
+    first = simulate_game(0, 150, constants, seed=11)
+    second = simulate_game(0, 150, constants, seed=11)
+    
+    assert first['seed'] == 11
+    assert without_timing(first) == without_timing(second)
+
+
+def test_batch_is_reproducible_across_worker_processes():
+    results = run_batch(3, 100, workers=2, seed=20)
+    replay = run_batch(3, 100, workers=1, seed=20)
+    
+    assert [result['seed'] for result in results] == [20, 21, 22]
+    assert [without_timing(result) for result in results] == [without_timing(result) for result in replay]
+    
+    # Each game matches the same game played alone in this process
+    assert without_timing(results[1]) == without_timing(simulate_game(1, 100, get_constants(), seed=21))
+    
+    summary = aggregate(results)
+    assert summary['games'] == 3
+    assert summary['deaths'] == sum(result['outcome'] == 'dead' for result in results)
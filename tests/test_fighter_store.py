@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+import tcod as libtcod
+
+from batch_simulation import simulate_game
+from components.ai import BasicMonster
+from components.fighter import Fighter
+from entity import Entity
+from item_functions import cast_fireball
+from loader_functions.initialize_new_game import get_constants
+from map_objects.fighter_store import FighterStore
+from map_objects.fov_functions import recompute_fov
+from map_objects.game_map import GameMap
+
+
+def make_floor(use_fighter_store, seed=3, count=60):
+    random = np.random.default_rng(seed)
+    game_map = GameMap(30, 20, use_fighter_store=use_fighter_store)
+    game_map.walkable[...] = True
+    game_map.transparent[...] = True
+    
+    monsters = []
+    
+    for index, (x, y, hp) in enumerate(zip(random.integers(0, 30, count).tolist(), random.integers(0, 20, count).tolist(),
+                                           random.integers(1, 30, count).tolist())):
+        monster = Entity(x, y, 'orc {0}'.format(index), 'o', libtcod.white, fighter=Fighter(hp=hp, defense=0, power=3, xp=index),
+                         ai=BasicMonster())
+        monster.fighter.owner = monster
+        game_map.set_entity(x, y, monster)
+        monsters.append(monster)
+    
+    # Some fighters left the map
+    for monster in monsters[::9]:
+        game_map.remove_entity(monster.x, monster.y, monster)
+    
+    recompute_fov(game_map.fov_map, 15, 10, fov_radius=0)
+    
+    return game_map, monsters
+
+
+def burn(use_fighter_store, target_x, target_y):
+    game_map, monsters = make_floor(use_fighter_store)
+    results = cast_fireball(None, game_map=game_map, fov_map=game_map.fov_map, damage=12, radius=3,
+                            target_x=target_x, target_y=target_y)
+    
+    burned = sorted(result['message'].text for result in results[1:] if 'message' in result)
+    dead = sorted((result['dead'].name, result['xp']) for result in results if result.get('dead'))
+    
+    return burned, dead, [monster.fighter.hp for monster in monsters]
+
+
+@pytest.mark.parametrize('target', [(15, 10), (3, 17), (29, 19), (7, 12)])
+def test_fireball_burns_the_same_fighters_with_and_without_a_store(target):
+    burned, dead, hps = burn(True, *target)
+    
+    assert burned
+    assert (burned, dead, hps) == burn(False, *target)
+
+
+def test_in_radius_matches_a_brute_force_search():
+    game_map, monsters = make_floor(True)
+    store = game_map.fighter_store
+    on_map = [monster for index, monster in enumerate(monsters) if index % 9]
+    
+    for x, y, radius in [(15, 10, 3), (0, 0, 5), (29, 19, 1), (10, 4, 0), (15, 10, 40)]:
+        found = sorted(store.fighters[index].owner.name for index in store.in_radius(x, y, radius).tolist())
+        assert found == sorted(monster.name for monster in on_map if (monster.x - x) ** 2 + (monster.y - y) ** 2 <= radius ** 2)
+
+
+def test_fighters_keep_their_stats_when_the_store_grows():
+    store = FighterStore(capacity=2)
+    fighters = [Fighter(hp=index + 1, defense=index, power=2 * index, xp=3 * index) for index in range(9)]
+    
+    for index, fighter in enumerate(fighters):
+        store.add(fighter)
+        store.place(fighter, index, index)
+    
+    assert [(fighter.hp, fighter.base_defense, fighter.base_power, fighter.xp) for fighter in fighters] == \
+           [(index + 1, index, 2 * index, 3 * index) for index in range(9)]
+    assert store.x[:store.count].tolist() == list(range(9))
+    
+    fighters[4].hp = 0
+    assert store.hp[4] == 0
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_games_play_the_same_with_and_without_a_store(seed):
+    results = []
+    
+    for fighter_store in (False, True):
+        result = simulate_game(0, 200, dict(get_constants(), fighter_store=fighter_store), seed)
+        del result['time_per_turn']
+        results.append(result)
+    
+    assert results[0] == results[1]
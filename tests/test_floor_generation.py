@@ -0,0 +1,45 @@
+import numpy as np
+
+from loader_functions.initialize_new_game import get_constants
+from map_objects.game_map import GameMap
+
+
+def generate(seed, floor, constants):
+    game_map = GameMap(constants['map_width'], constants['map_height'], seed=seed)
+    
+    return game_map.generate_floor(floor, constants)
+
+
+def test_no_fighter_on_player_start():
+    constants = get_constants()
+    
+    for seed in range(100):
+        for floor in (2, 3, 4, 6):
+            floor_map, entities = generate(seed, floor, constants)
+            
+            assert not any(entity.fighter for entity in floor_map.get_entities(*floor_map.player_start)), (seed, floor)
+
+
+def test_same_seed_same_floor():
+    constants = get_constants()
+    
+    first_map, first_entities = generate(7, 3, constants)
+    second_map, second_entities = generate(7, 3, constants)
+    
+    assert np.array_equal(first_map.walkable, second_map.walkable)
+    assert first_map.player_start == second_map.player_start
+    assert [(entity.name, entity.x, entity.y) for entity in first_entities] == [
+        (entity.name, entity.x, entity.y) for entity in second_entities]
+
+
+def test_pregenerated_floor_matches_generated_floor():
+    constants = get_constants()
+    game_map = GameMap(constants['map_width'], constants['map_height'], seed=11)
+    
+    game_map.pregenerate_floor(2, constants)
+    pregenerated_map, pregenerated_entities = game_map.take_pregenerated_floor(2, constants)
+    generated_map, generated_entities = game_map.generate_floor(2, constants)
+    
+    assert np.array_equal(pregenerated_map.walkable, generated_map.walkable)
+    assert [(entity.name, entity.x, entity.y) for entity in pregenerated_entities] == [
+        (entity.name, entity.x, entity.y) for entity in generated_entities]
@@ -0,0 +1,110 @@
+import numpy as np
+import tcod as libtcod
+
+from map_objects.map_generators import first_fit, fill_rectangles, label_areas, largest_area, square_regions
+from map_objects.rectangle import Rect
+
+
+def test_first_fit_matches_rooms_taken_one_at_a_time():
+    random = np.random.default_rng(3)
+    
+    for _ in range(20):
+        w = random.integers(6, 10, size=300, endpoint=True)
+        h = random.integers(6, 10, size=300, endpoint=True)
+        x = random.integers(0, 100 - w - 1, endpoint=True)
+        y = random.integers(0, 100 - h - 1, endpoint=True)
+        
+        expected = []
+        rooms = []
+        
+        for index, room in enumerate(Rect(*bounds) for bounds in zip(x.tolist(), y.tolist(), w.tolist(), h.tolist())):
+            if not any(room.intersect(other_room) for other_room in rooms):
+                rooms.append(room)
+                expected.append(index)
+        
+        assert first_fit(x, y, x + w, y + h).tolist() == expected
+
+
+def test_fill_rectangles_matches_slicing():
+    random = np.random.default_rng(5)
+    x1 = random.integers(0, 50, size=200)
+    y1 = random.integers(0, 30, size=200)
+    x2 = x1 + random.integers(0, 10, size=200)
+    y2 = y1 + random.integers(0, 10, size=200)
+    
+    expected = np.zeros((60, 40), dtype=np.bool_)
+    
+    for bounds in zip(x1.tolist(), y1.tolist(), x2.tolist(), y2.tolist()):
+        expected[bounds[0]:bounds[2] + 1, bounds[1]:bounds[3] + 1] = True
+    
+    assert np.array_equal(fill_rectangles((60, 40), x1, y1, x2, y2), expected)
+
+
+def test_generators_use_the_size_of_the_map():
+    from loader_functions.initialize_new_game import get_constants
+    from map_objects.game_map import GameMap
+    from map_objects.map_generators import map_generators
+    
+    constants = get_constants()
+    
+    for map_generator in map_generators:
+        for width, height in ((30, 20), (12, 12)):
+            game_map = GameMap(width, height, seed=1)
+            entities = []
+            
+            game_map.make_map(constants['room_min_size'], constants['room_max_size'], constants['max_rooms'],
+                              constants['map_width'], constants['map_height'], None, entities, map_generator)
+            
+            assert game_map.walkable[game_map.player_start], (map_generator, width, height)
+            assert all(0 <= entity.x < width and 0 <= entity.y < height for entity in entities)
+
+
+def test_bsp_keeps_to_max_rooms():
+    from map_objects.game_map import GameMap
+    from map_objects.map_generators import generate_bsp
+    
+    for max_rooms in (1, 2, 5, 30):
+        rooms = generate_bsp(GameMap(80, 45, seed=2), 6, 10, max_rooms)
+        
+        assert 1 <= len(rooms) <= max_rooms
+
+
+def flood_fill_labels(floor):
+    # One Dijkstra map per area, labelled by its first tile
+    labels = np.full(floor.shape, -1)
+    
+    for x, y in np.argwhere(floor).tolist():
+        if labels[x, y] < 0:
+            distance = libtcod.path.maxarray(floor.shape, order='F')
+            distance[x, y] = 0
+            distance = libtcod.path.dijkstra2d(distance, floor, 1, 1)
+            labels[(distance < np.iinfo(distance.dtype).max) & floor] = x * floor.shape[1] + y
+    
+    return labels
+
+
+def test_label_areas_matches_a_flood_fill():
+    random = np.random.default_rng(7)
+    
+    for _ in range(100):
+        shape = random.integers(1, 30, size=2, endpoint=True)
+        floor = random.random(shape) < random.random()
+        labels = flood_fill_labels(floor)
+        
+        assert np.array_equal(label_areas(floor), labels)
+        
+        sizes = np.bincount(labels[floor], minlength=1)
+        assert largest_area(floor).sum() == sizes.max()
+
+
+def test_square_regions_are_on_the_floor_and_apart():
+    random = np.random.default_rng(9)
+    
+    for radius in (1, 3, 5):
+        walkable = random.random((80, 50)) < 0.6
+        regions = square_regions(walkable, radius, 30, random)
+        
+        assert 1 <= len(regions) <= 30
+        assert all(walkable[region.center()] for region in regions)
+        assert all(0 <= region.x1 and region.x2 < 80 and 0 <= region.y1 and region.y2 < 50 for region in regions)
+        assert not any(region.intersect(other) for index, region in enumerate(regions) for other in regions[index + 1:])
@@ -0,0 +1,85 @@
+import numpy as np
+import tcod as libtcod
+
+from components.fighter import Fighter
+from entity import Entity
+from loader_functions.initialize_new_game import get_constants
+from map_objects.game_map import GameMap
+from render_functions import RenderOrder
+
+
+def make_fighter(x, y, name='Orc'):
+    return Entity(x, y, name, 'o', libtcod.white, fighter=Fighter(hp=10, defense=0, power=3), render_order=RenderOrder.ACTOR)
+
+
+def expected_cost(game_map):
+    blockers = np.zeros((game_map.width, game_map.height), dtype=np.int8)
+    
+    for (x, y), entities_in_tile in game_map.entity_index.cells.items():
+        blockers[x, y] = sum(1 for entity in entities_in_tile if entity.fighter)
+    
+    return game_map.walkable & (blockers == 0)
+
+
+def test_cost_grid_follows_the_fighters():
+    constants = get_constants()
+    game_map = GameMap(constants['map_width'], constants['map_height'], dungeon_level=4, seed=5)
+    entities = []
+    game_map.make_map(constants['room_min_size'], constants['room_max_size'], constants['max_rooms'],
+                      constants['map_width'], constants['map_height'], None, entities)
+    
+    random = np.random.default_rng(0)
+    fighters = [entity for entity in entities if entity.fighter]
+    
+    for _ in range(200):
+        fighter = fighters[random.integers(len(fighters))]
+        dx, dy = random.integers(-1, 2, size=2).tolist()
+        
+        if game_map.walkable[fighter.x + dx, fighter.y + dy]:
+            fighter.move(dx, dy, game_map)
+    
+    assert np.array_equal(game_map.cost.astype(np.bool_), expected_cost(game_map))
+
+
+def test_astar_walks_around_fighters_and_restores_the_cost_grid():
+    game_map = GameMap(12, 7)
+    game_map.carve(slice(1, 11), slice(1, 6))
+    
+    monster = make_fighter(2, 3)
+    blocker = make_fighter(3, 3, 'Troll')
+    target = make_fighter(8, 3, 'Player')
+    
+    for entity in (monster, blocker, target):
+        game_map.set_entity(entity.x, entity.y, entity)
+    
+    cost_before = game_map.cost.copy()
+    monster.move_astar(target, [monster, blocker, target], game_map)
+    
+    assert (monster.x, monster.y) in ((3, 2), (3, 4))
+    assert np.array_equal(game_map.cost.astype(np.bool_), expected_cost(game_map))
+    assert game_map.cost[blocker.x, blocker.y] == 0 and cost_before[blocker.x, blocker.y] == 0
+
+
+def test_tile_setter_keeps_the_cost_grid():
+    game_map = GameMap(10, 10)
+    fighter = make_fighter(5, 5)
+    game_map.set_entity(5, 5, fighter)
+    
+    game_map.tiles[3][3].blocked = False
+    game_map.tiles[5][5].blocked = False
+    assert game_map.cost[3, 3] == 1 and game_map.cost[5, 5] == 0
+    assert np.array_equal(game_map.cost, expected_cost(game_map))
+    
+    game_map.tiles[3][3].blocked = True
+    assert game_map.cost[3, 3] == 0
+    assert np.array_equal(game_map.cost, expected_cost(game_map))
+    
+    # A path through a tile opened with the setter
+    game_map.tiles[4][3].blocked = False
+    game_map.tiles[3][3].blocked = False
+    game_map.tiles[2][3].blocked = False
+    flow_field = game_map.get_flow_field(make_fighter(2, 3))
+    assert flow_field[4, 3] == 2
+    
+    game_map.tiles[3][3].blocked = True
+    assert game_map.get_flow_field(make_fighter(2, 3))[4, 3] == np.iinfo(flow_field.dtype).max
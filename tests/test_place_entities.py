@@ -0,0 +1,20 @@
+from loader_functions.initialize_new_game import get_constants
+from map_objects.game_map import GameMap
+
+
+def test_spawns_only_on_free_floor_tiles():
+    constants = get_constants()
+    
+    for seed in range(30):
+        game_map = GameMap(constants['map_width'], constants['map_height'], dungeon_level=6, seed=seed)
+        entities = []
+        
+        game_map.make_map(constants['room_min_size'], constants['room_max_size'], constants['max_rooms'],
+                          constants['map_width'], constants['map_height'], None, entities)
+        
+        spawned = [entity for entity in entities if not entity.stairs]
+        positions = [(entity.x, entity.y) for entity in spawned]
+        
+        assert len(set(positions)) == len(positions)
+        assert game_map.player_start not in positions
+        assert all(game_map.walkable[position] for position in positions)
@@ -0,0 +1,93 @@
+import os
+
+import numpy as np
+import pytest
+
+from loader_functions.data_loaders import AUTOSAVE_FILE, SAVE_FILE, SAVE_VERSION, load_game, save_game, snapshot_game, write_save
+from loader_functions.initialize_new_game import get_constants
+from simulation import BotInput, new_session, run_headless
+
+
+def played_session(seed=5, turns=60):
+    session = new_session(get_constants(), seed)
+    run_headless(session, BotInput(), turns)
+    
+    return session
+
+
+def describe(entity):
+    fighter = entity.fighter and (entity.fighter.hp, entity.fighter.max_hp, entity.fighter.power, entity.fighter.defense)
+    inventory = entity.inventory and [item.name for item in entity.inventory.items]
+    
+    return entity.name, entity.char, entity.x, entity.y, entity.speed, entity.render_order, fighter, inventory
+
+
+def save(session):
+    save_game(session.player, session.entities, session.game_map, session.message_log, session.game_state)
+
+
+def test_round_trip_restores_the_game(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    session = played_session()
+    save(session)
+    
+    player, entities, game_map, message_log, game_state = load_game()
+    
+    assert [describe(entity) for entity in entities] == [describe(entity) for entity in session.entities]
+    assert entities.index(player) == session.entities.index(session.player)
+    assert game_state == session.game_state
+    
+    assert game_map.dungeon_level == session.game_map.dungeon_level
+    assert game_map.rng.getstate() == session.game_map.rng.getstate()
+    
+    for layer in ('walkable', 'transparent', 'explored'):
+        assert np.array_equal(getattr(game_map, layer), getattr(session.game_map, layer))
+    
+    assert [(message.text, tuple(message.color)) for message in message_log.messages] == \
+           [(message.text, tuple(message.color)) for message in session.message_log.messages]
+    
+    # Loaded entities are back in the spatial index
+    for entity in entities:
+        assert entity in game_map.get_entities(entity.x, entity.y)
+
+
+def test_most_recent_save_is_loaded(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    session = played_session(turns=10)
+    save(session)
+    
+    later = played_session(turns=80)
+    write_save(snapshot_game(later.player, later.entities, later.game_map, later.message_log, later.game_state), AUTOSAVE_FILE)
+    os.utime(SAVE_FILE, (0, 0))
+    
+    player, entities, game_map, message_log, game_state = load_game()
+    assert describe(player) == describe(later.player)
+
+
+def test_no_save_raises_file_not_found(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    
+    with pytest.raises(FileNotFoundError):
+        load_game()
+
+
+@pytest.mark.parametrize('version', [SAVE_VERSION - 1, SAVE_VERSION + 1])
+def test_other_save_versions_are_rejected(tmp_path, monkeypatch, version):
+    monkeypatch.chdir(tmp_path)
+    session = played_session(turns=10)
+    data_file = snapshot_game(session.player, session.entities, session.game_map, session.message_log, session.game_state)
+    data_file['version'] = np.array(version)
+    write_save(data_file, SAVE_FILE)
+    
+    with pytest.raises(ValueError):
+        load_game()
+
+
+def test_corrupt_save_is_rejected(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    
+    with open(SAVE_FILE, 'wb') as file:
+        file.write(b'not a save game')
+    
+    with pytest.raises((ValueError, OSError)):
+        load_game()
@@ -0,0 +1,71 @@
+import math
+
+import numpy as np
+import tcod as libtcod
+
+from entity import Entity
+from map_objects.spatial_index import SpatialIndex
+from render_functions import RenderOrder
+
+
+def make_entities(random, count, width, height):
+    return [Entity(int(x), int(y), 'Entity {0}'.format(index), 'e', libtcod.white, render_order=RenderOrder(int(order)))
+            for index, (x, y, order) in enumerate(zip(random.integers(0, width, count), random.integers(0, height, count),
+                                                      random.integers(1, 5, count)))]
+
+
+def make_index(entities, width, height):
+    index = SpatialIndex(width, height)
+    
+    for entity in entities:
+        index.add(entity, entity.x, entity.y)
+    
+    return index
+
+
+def names(entities):
+    return sorted(entity.name for entity in entities)
+
+
+def test_queries_match_a_brute_force_search():
+    random = np.random.default_rng(1)
+    width, height = 70, 40
+    entities = make_entities(random, 300, width, height)
+    index = make_index(entities, width, height)
+    
+    # Some entities leave the index
+    for entity in entities[::7]:
+        index.remove(entity, entity.x, entity.y)
+    
+    entities = [entity for position, entity in enumerate(entities) if position % 7]
+    
+    for x, y in zip(random.integers(0, width, 50).tolist(), random.integers(0, height, 50).tolist()):
+        assert names(index.at(x, y)) == names(entity for entity in entities if (entity.x, entity.y) == (x, y))
+        
+        radius = float(random.uniform(0, 12))
+        assert names(index.in_radius(x, y, radius)) == names(entity for entity in entities if entity.distance(x, y) <= radius)
+        
+        x2, y2 = x + int(random.integers(0, 15)), y + int(random.integers(0, 15))
+        assert names(index.in_rect(x, y, x2, y2)) == names(entity for entity in entities
+                                                          if x <= entity.x <= x2 and y <= entity.y <= y2)
+        
+        max_distance = float(random.uniform(1, 30))
+        nearest, distance = index.nearest(x, y, max_distance, lambda entity: entity.render_order != RenderOrder.ITEM)
+        candidates = [entity.distance(x, y) for entity in entities
+                      if entity.render_order != RenderOrder.ITEM and entity.distance(x, y) < max_distance]
+        
+        if candidates:
+            assert math.isclose(distance, min(candidates)) and nearest.distance(x, y) == distance
+        else:
+            assert nearest is None
+
+
+def test_entities_of_a_tile_are_sorted_by_render_order():
+    random = np.random.default_rng(2)
+    entities = make_entities(random, 200, 5, 5)
+    index = make_index(entities, 5, 5)
+    
+    for x in range(5):
+        for y in range(5):
+            orders = [entity.render_order.value for entity in index.at(x, y)]
+            assert orders == sorted(orders)
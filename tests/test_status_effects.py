@@ -0,0 +1,108 @@
+import tcod as libtcod
+
+from components.ai import BasicMonster, ConfusedMonster
+from components.fighter import Fighter
+from entity import Entity
+from status_effects import Confusion, Poison, Regeneration, StatusEffects
+
+
+def make_monster(name='orc', hp=10):
+    fighter = Fighter(hp=hp, defense=0, power=3)
+    
+    return Entity(0, 0, name, 'o', libtcod.white, fighter=fighter, ai=BasicMonster())
+
+
+def run_turns(status_effects, turns):
+    return [status_effects.update() for _ in range(turns)]
+
+
+def test_confusion_gives_the_ai_back_when_it_expires():
+    status_effects = StatusEffects()
+    monster = make_monster()
+    ai = monster.ai
+    
+    status_effects.add(monster, Confusion(3))
+    assert isinstance(monster.ai, ConfusedMonster) and monster.ai.owner is monster
+    
+    results = run_turns(status_effects, 3)
+    assert results[0] == [] and results[1] == []
+    assert len(results[2]) == 1 and 'no longer confused' in results[2][0]['message'].text
+    assert monster.ai is ai
+    assert status_effects.scheduled() == []
+
+
+def test_overlapping_confusions_give_the_ai_back_once():
+    status_effects = StatusEffects()
+    monster = make_monster()
+    ai = monster.ai
+    
+    status_effects.add(monster, Confusion(2))
+    status_effects.add(monster, Confusion(4))
+    assert monster.ai.preivous_ai is ai
+    
+    run_turns(status_effects, 2)
+    assert monster.ai is ai
+    assert run_turns(status_effects, 2) == [[], []]
+    assert monster.ai is ai
+
+
+def test_poison_ticks_every_turn_until_it_expires():
+    status_effects = StatusEffects()
+    monster = make_monster(hp=10)
+    
+    status_effects.add(monster, Poison(3, amount=2))
+    run_turns(status_effects, 3)
+    assert monster.fighter.hp == 4
+    
+    run_turns(status_effects, 3)
+    assert monster.fighter.hp == 4
+
+
+def test_poison_kill_is_tagged():
+    status_effects = StatusEffects()
+    monster = make_monster(hp=3)
+    
+    status_effects.add(monster, Poison(5, amount=2))
+    status_effects.update()
+    results = status_effects.update()
+    
+    deaths = [result for result in results if result.get('dead')]
+    assert deaths == [{'dead': monster, 'xp': 0, 'cause': 'poison'}]
+
+
+def test_regeneration_heals_up_to_max_hp():
+    status_effects = StatusEffects()
+    monster = make_monster(hp=10)
+    monster.fighter.hp = 5
+    
+    status_effects.add(monster, Regeneration(10, amount=2))
+    run_turns(status_effects, 2)
+    assert monster.fighter.hp == 9
+    
+    run_turns(status_effects, 2)
+    assert monster.fighter.hp == 10
+
+
+def test_effects_fire_in_turn_order():
+    status_effects = StatusEffects()
+    monsters = [make_monster('orc {0}'.format(index)) for index in range(3)]
+    
+    for monster, duration in zip(monsters, (5, 1, 3)):
+        status_effects.add(monster, Confusion(duration))
+    
+    expired = [[result['message'].text.split(' is ')[0] for result in results] for results in run_turns(status_effects, 5)]
+    assert expired == [['The orc 1'], [], ['The orc 2'], [], ['The orc 0']]
+
+
+def test_end_effects_keeps_the_player_effects():
+    status_effects = StatusEffects()
+    player = make_monster('player')
+    monster = make_monster()
+    ai = monster.ai
+    
+    status_effects.add(monster, Confusion(10))
+    status_effects.add(player, Regeneration(10, amount=1))
+    status_effects.end_effects(player)
+    
+    assert monster.ai is ai
+    assert [effect.entity for _, effect in status_effects.scheduled()] == [player]